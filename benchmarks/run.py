@@ -0,0 +1,177 @@
+import sys
+import os
+import argparse
+import datetime
+import json
+import logging
+import platform
+import subprocess
+import tempfile
+from typing import Dict, Optional
+
+sys.path.append(
+    os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+)
+
+from utils.log_config import configure_logging
+from utils.rate_limit import ThrottleSettings, throttles
+
+REPO_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+RESULTS_DIR = os.path.join(REPO_DIR, "benchmarks", "results")
+
+STAGES = ("database", "email", "scraper", "apollo")
+
+logger = logging.getLogger(__name__)
+
+
+def git_commit() -> Optional[str]:
+    """Get the short hash of the commit being benchmarked."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPO_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def use_scratch_database() -> str:
+    """Switch to an empty working directory so the real database is untouched.
+
+    The database lives at core/database/companies.db relative to the working
+    directory, so this must run before the database is first used.
+    """
+    workdir = tempfile.mkdtemp(prefix="tcg-benchmark-")
+    os.makedirs(os.path.join(workdir, "core", "database"))
+    os.chdir(workdir)
+    return workdir
+
+
+def run_stages(args: argparse.Namespace) -> Dict[str, Dict]:
+    """Run the chosen stages, recording an error for any that fails."""
+    from benchmarks import stages
+    from benchmarks.server import FixtureServer
+    from benchmarks.smtp_sink import SMTPSink
+
+    results = {}
+    with FixtureServer(
+        page_size=args.page_size, pages_per_search=args.pages
+    ) as server, SMTPSink() as sink:
+        for stage in args.stages:
+            logger.info(f"Benchmarking {stage}")
+            try:
+                if stage == "database":
+                    results[stage] = stages.bench_database(args.companies)
+                elif stage == "email":
+                    results[stage] = stages.bench_email(
+                        sink, args.emails, args.connections
+                    )
+                else:
+                    # nodriver drives the browser from its own event loop
+                    import nodriver as uc
+
+                    if stage == "scraper":
+                        bench = stages.bench_scraper(
+                            server, args.job_titles, args.tabs
+                        )
+                    else:
+                        bench = stages.bench_apollo(
+                            server, args.lookups, args.tabs
+                        )
+                    results[stage] = uc.loop().run_until_complete(bench)
+            except Exception as e:
+                logger.error(f"{stage} benchmark failed", exc_info=True)
+                results[stage] = {"error": f"{type(e).__name__}: {e}"}
+    return results
+
+
+def compare(results: Dict[str, Dict], baseline_path: str) -> None:
+    """Print how each rate changed since a baseline results file."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\nCompared with {baseline.get('commit')} ({baseline_path}):")
+    for stage, metrics in results.items():
+        old_metrics = baseline.get("results", {}).get(stage, {})
+        for name, value in metrics.items():
+            old = old_metrics.get(name)
+            if not name.endswith("_per_sec") or not old:
+                continue
+            change = (value - old) / old * 100
+            print(f"  {stage}.{name}: {old} -> {value} ({change:+.1f}%)")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Benchmark the pipeline stages against local fixtures"
+    )
+    parser.add_argument(
+        "stages",
+        nargs="*",
+        choices=STAGES,
+        default=list(STAGES),
+        help="stages to benchmark, all of them by default",
+    )
+    parser.add_argument(
+        "--output", metavar="PATH", help="results file to write"
+    )
+    parser.add_argument(
+        "--compare", metavar="PATH", help="earlier results file to compare to"
+    )
+    parser.add_argument("--companies", type=int, default=2000)
+    parser.add_argument("--emails", type=int, default=200)
+    parser.add_argument("--connections", type=int, default=2)
+    parser.add_argument("--job-titles", type=int, default=4)
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--pages", type=int, default=3)
+    parser.add_argument("--lookups", type=int, default=50)
+    parser.add_argument("--tabs", type=int, default=3)
+    parser.add_argument(
+        "-v", "--verbose", action="store_true", help="show the stages' logs"
+    )
+    return parser
+
+
+def main() -> None:
+    args = build_parser().parse_args()
+    configure_logging(logging.INFO if args.verbose else logging.WARNING)
+    started_at = datetime.datetime.now()
+    commit = git_commit()
+    output = args.output or os.path.join(
+        RESULTS_DIR,
+        f"{started_at.strftime('%Y%m%d-%H%M%S')}-{commit or 'unknown'}.json",
+    )
+    output = os.path.abspath(output)
+    baseline = os.path.abspath(args.compare) if args.compare else None
+
+    use_scratch_database()
+    # Stages run as fast as they can, the local servers never push back
+    throttles.configure(ThrottleSettings(enabled=False))
+    results = run_stages(args)
+
+    report = {
+        "commit": commit,
+        "started_at": started_at.isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": {
+            name: value
+            for name, value in vars(args).items()
+            if name not in ("output", "compare", "verbose")
+        },
+        "results": results,
+    }
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(json.dumps(results, indent=2))
+    print(f"\nResults saved to {output}")
+    if baseline:
+        compare(results, baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+import json
+import threading
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List
+from urllib.parse import parse_qs, unquote, urlparse
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+# Path the fake Apollo app is served under, its base_url is the server's
+# address plus this
+APOLLO_PATH = "/apollo"
+
+
+def load_fixture(name: str) -> str:
+    """Read a fixture file from benchmarks/fixtures."""
+    return (FIXTURES_DIR / name).read_text()
+
+
+def fill(template: str, **values) -> str:
+    """Replace {name} placeholders, leaving every other brace alone."""
+    for name, value in values.items():
+        template = template.replace("{" + name + "}", str(value))
+    return template
+
+
+class FixtureServer:
+    """Local HTTP server standing in for wellfound.com and app.apollo.io.
+
+    Every search has pages_per_search pages of page_size startups, numbered
+    so no two searches share a company. Every fourth startup has no
+    companyUrl, so its website is read from its profile page as on the real
+    site. Apollo finds a contact for every domain but about one in
+    miss_every.
+    """
+
+    def __init__(
+        self,
+        page_size: int = 20,
+        pages_per_search: int = 3,
+        miss_every: int = 5,
+    ):
+        self.page_size = page_size
+        self.pages_per_search = pages_per_search
+        self.miss_every = miss_every
+        self.requests = 0
+        self._search_page = load_fixture("wellfound_search.html")
+        self._listing = load_fixture("wellfound_listing.html")
+        self._company_page = load_fixture("wellfound_company.html")
+        self._startup = load_fixture("wellfound_startup.json")
+        self._apollo_app = load_fixture("apollo_app.html")
+        self._people = load_fixture("apollo_people.json")
+        self._server = ThreadingHTTPServer(
+            ("127.0.0.1", 0), self._handler_class()
+        )
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, daemon=True
+        )
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "FixtureServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _startups(self, search: str, page: int) -> List[Dict]:
+        if page > self.pages_per_search:
+            return []
+        startups = []
+        for index in range(self.page_size):
+            slug = f"{search}-p{page}-{index}"
+            startup_id = zlib.crc32(slug.encode())
+            startup = json.loads(
+                fill(
+                    self._startup,
+                    id=startup_id,
+                    name=f"Startup {slug}",
+                    slug=slug,
+                )
+            )
+            if index % 4 == 3:
+                del startup["companyUrl"]
+            startups.append(startup)
+        return startups
+
+    def search_page(self, path: str, query: Dict[str, List[str]]) -> str:
+        """Render a Wellfound search results page."""
+        search = "-".join(part for part in path.split("/")[2:] if part)
+        page = int(query.get("page", ["1"])[0])
+        startups = self._startups(search, page)
+        next_data = {
+            "props": {
+                "pageProps": {
+                    "apolloState": {
+                        "data": {
+                            f"StartupResult:{startup['id']}": startup
+                            for startup in startups
+                        }
+                    }
+                }
+            },
+            "page": "/role/[...slug]",
+            "query": {"page": str(page)},
+        }
+        listings = "".join(
+            fill(
+                self._listing,
+                slug=startup["slug"],
+                name=startup["name"],
+                size="11-50",
+            )
+            for startup in startups
+        )
+        return fill(
+            self._search_page,
+            title=search.replace("-", " "),
+            listings=listings,
+            next_data=json.dumps(next_data),
+        )
+
+    def company_page(self, slug: str) -> str:
+        """Render a Wellfound company profile page."""
+        return fill(self._company_page, slug=slug, name=f"Startup {slug}")
+
+    def apollo_app(self) -> str:
+        """Render the fake Apollo web app."""
+        return self._apollo_app
+
+    def people(self, domain: str) -> str:
+        """Render the Apollo people search response for a domain."""
+        person_id = zlib.crc32(domain.encode())
+        payload = json.loads(fill(self._people, domain=domain, id=person_id))
+        if self.miss_every and person_id % self.miss_every == 0:
+            payload["people"] = []
+            payload["pagination"]["total_entries"] = 0
+        return json.dumps(payload)
+
+    def _handler_class(self):
+        fixtures = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                fixtures.requests += 1
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                if url.path.startswith("/role/"):
+                    self._send(fixtures.search_page(url.path, query))
+                elif url.path.startswith("/company/"):
+                    slug = unquote(url.path[len("/company/"):])
+                    self._send(fixtures.company_page(slug))
+                elif url.path.rstrip("/") == APOLLO_PATH:
+                    self._send(fixtures.apollo_app())
+                elif url.path == "/api/v1/mixed_people/search":
+                    domain = query.get("q_keywords", [""])[0]
+                    self._send(fixtures.people(domain), "application/json")
+                else:
+                    self._send("Page not found", status=404)
+
+            def _send(
+                self,
+                body: str,
+                content_type: str = "text/html; charset=utf-8",
+                status: int = 200,
+            ) -> None:
+                data = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
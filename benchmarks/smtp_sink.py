@@ -0,0 +1,98 @@
+import socketserver
+import threading
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Speaks just enough SMTP for smtplib to deliver messages."""
+
+    def _reply(self, line: str) -> None:
+        self.wfile.write(f"{line}\r\n".encode("ascii"))
+
+    def _read_data(self):
+        """Read a message up to its terminating dot, returning its size.
+
+        Messages are read in large chunks rather than line by line, so the
+        sink stays much faster than the client it measures.
+        """
+        size = 0
+        tail = b"\r\n"
+        while True:
+            chunk = self.rfile.read1(65536)
+            if not chunk:
+                return None
+            window = tail + chunk
+            end = window.find(b"\r\n.\r\n")
+            if end != -1:
+                return max(0, size + end - len(tail))
+            size += len(chunk)
+            tail = window[-4:]
+
+    def handle(self) -> None:
+        self._reply("220 localhost SMTP sink ready")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line[:4].decode("ascii", "replace").upper()
+            if command == "EHLO":
+                self._reply("250-localhost")
+                self._reply("250-8BITMIME")
+                self._reply("250 SIZE 52428800")
+            elif command == "HELO":
+                self._reply("250 localhost")
+            elif command in ("MAIL", "RCPT", "RSET", "NOOP"):
+                self._reply("250 OK")
+            elif command == "DATA":
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+                size = self._read_data()
+                if size is None:
+                    return
+                self.server.sink.received(size)
+                self._reply("250 OK queued")
+            elif command == "QUIT":
+                self._reply("221 Bye")
+                return
+            else:
+                self._reply("502 Command not implemented")
+
+
+class SMTPSink:
+    """Local SMTP server that accepts and discards every message.
+
+    Plain SMTP without TLS or login, counting messages and bytes so a
+    benchmark can check every email arrived.
+    """
+
+    def __init__(self):
+        self.messages = 0
+        self.bytes = 0
+        self._lock = threading.Lock()
+        self._server = socketserver.ThreadingTCPServer(
+            ("127.0.0.1", 0), _SMTPHandler
+        )
+        self._server.daemon_threads = True
+        self._server.sink = self
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, daemon=True
+        )
+
+    @property
+    def host(self) -> str:
+        return self._server.server_address[0]
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def received(self, size: int) -> None:
+        with self._lock:
+            self.messages += 1
+            self.bytes += size
+
+    def __enter__(self) -> "SMTPSink":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,227 @@
+import sys
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict
+
+sys.path.append(
+    os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+)
+
+from benchmarks.server import APOLLO_PATH, FixtureServer
+from benchmarks.smtp_sink import SMTPSink
+from config.config import OUR_NAME
+from core.pipeline.records import CompanyRecord
+
+TEMPLATES_DIR = Path(__file__).parent.parent / "templates"
+
+
+def _rate(count: int, seconds: float) -> float:
+    return round(count / seconds, 2) if seconds else 0.0
+
+
+def bench_database(companies: int) -> Dict[str, float]:
+    """Time inserts, seen lookups, page filtering and stage upserts."""
+    from core.database import sqlite as db
+
+    rows = [
+        {
+            "company_name": f"Company {index}",
+            "description": "Software for teams that ship",
+            "job_type": "software engineer",
+            "size": "11-50",
+            "location": "san diego",
+            "website": f"company{index}.example.com",
+        }
+        for index in range(companies)
+    ]
+    half = companies // 2
+
+    start = time.perf_counter()
+    for row in rows[:half]:
+        db.add_company_seen(**row)
+    insert_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    db.add_companies_seen_bulk(rows[half:])
+    bulk_seconds = time.perf_counter() - start
+
+    # Half the lookups hit and half miss, as when scraping new searches
+    names = [row["company_name"] for row in rows]
+    names += [f"Unseen {index}" for index in range(companies)]
+    start = time.perf_counter()
+    for name in names:
+        db.company_seen_before(name)
+    lookup_seconds = time.perf_counter() - start
+
+    # Pages of search results as the scraper filters them, half seen before
+    pages = [
+        rows[index : index + 10] + [
+            {"company_name": f"Unseen {number}", "size": "11-50"}
+            for number in range(index, index + 10)
+        ]
+        for index in range(0, companies, 10)
+    ]
+    start = time.perf_counter()
+    for page in pages:
+        db.filter_new_companies(page, max_size=100)
+    filter_seconds = time.perf_counter() - start
+
+    records = [CompanyRecord.from_dict(row) for row in rows]
+    start = time.perf_counter()
+    for record in records:
+        db.set_company_stage(record.to_dict(), db.STAGE_SCRAPED)
+    stage_seconds = time.perf_counter() - start
+
+    return {
+        "inserts": half,
+        "inserts_per_sec": _rate(half, insert_seconds),
+        "bulk_inserts": companies - half,
+        "bulk_inserts_per_sec": _rate(companies - half, bulk_seconds),
+        "lookups": len(names),
+        "lookups_per_sec": _rate(len(names), lookup_seconds),
+        "filtered_pages": len(pages),
+        "filtered_pages_per_sec": _rate(len(pages), filter_seconds),
+        "stage_updates": len(records),
+        "stage_updates_per_sec": _rate(len(records), stage_seconds),
+    }
+
+
+def bench_email(sink: SMTPSink, emails: int, connections: int) -> Dict:
+    """Time EmailClient.send_email against the local SMTP sink."""
+    from core.email.client import EmailClient, EmailConfig
+
+    client = EmailClient(
+        EmailConfig(
+            email_user="benchmark@example.com",
+            email_password="",
+            templates_dir=TEMPLATES_DIR,
+            our_name=OUR_NAME,
+            smtp_host=sink.host,
+            smtp_port=sink.port,
+            smtp_ssl=False,
+            connections=connections,
+            per_minute_limit=None,
+            daily_limit=None,
+        )
+    )
+    received = sink.messages
+    start = time.perf_counter()
+    try:
+        # One thread per connection, like the pipeline's send workers
+        with ThreadPoolExecutor(max_workers=connections) as executor:
+            sent = sum(
+                executor.map(
+                    lambda index: client.send_email(
+                        recipient_email=f"founder{index}@example.com",
+                        recipient_name=f"Founder {index}",
+                        company_name=f"Company {index}",
+                    ),
+                    range(emails),
+                )
+            )
+        seconds = time.perf_counter() - start
+    finally:
+        client.close()
+
+    return {
+        "messages": sent,
+        "received": sink.messages - received,
+        "connections": connections,
+        "messages_per_sec": _rate(sent, seconds),
+    }
+
+
+async def bench_scraper(
+    server: FixtureServer, job_titles: int, tabs: int
+) -> Dict:
+    """Time WellfoundScraper.scrape against the fixture server."""
+    from core.browser.profile import BrowserProfile
+    from core.scrapers.wellfound import WellfoundConfig, WellfoundScraper
+
+    config = WellfoundConfig(
+        job_titles=[f"role {index}" for index in range(job_titles)],
+        locations=["san diego"],
+        max_company_size=100,
+        base_url=server.url,
+        profile_tabs=tabs,
+        max_requests_per_host=tabs * 2,
+        search_tabs=tabs,
+        max_in_flight=tabs * 2,
+        page_timeout=10,
+        extraction_mode="network",
+        # One page past the last, so searches end on an empty page
+        max_pages=server.pages_per_search + 1,
+        incremental=False,
+        browser=BrowserProfile(headless=True),
+    )
+    scraper = WellfoundScraper(config)
+
+    start = time.perf_counter()
+    await scraper.initialize()
+    startup_seconds = time.perf_counter() - start
+
+    requests = server.requests
+    start = time.perf_counter()
+    companies = await scraper.scrape()
+    seconds = time.perf_counter() - start
+
+    return {
+        "searches": len(scraper._build_queries()),
+        "companies": len(companies),
+        "requests": server.requests - requests,
+        "startup_seconds": round(startup_seconds, 3),
+        "seconds": round(seconds, 3),
+        "companies_per_sec": _rate(len(companies), seconds),
+    }
+
+
+async def bench_apollo(server: FixtureServer, lookups: int, tabs: int) -> Dict:
+    """Time get_apollo_emails against the fake Apollo app."""
+    from core.apollo.apollo import (
+        ApolloClient,
+        ApolloConfig,
+        get_apollo_emails,
+    )
+    from core.browser.profile import BrowserProfile
+
+    client = ApolloClient(
+        ApolloConfig(
+            tabs=tabs,
+            base_url=f"{server.url}{APOLLO_PATH}",
+            requests_per_minute=None,
+            login_timeout=30,
+            extraction_mode="network",
+            browser=BrowserProfile(headless=True),
+        )
+    )
+    companies = [
+        CompanyRecord(
+            company_name=f"Company {index}",
+            website=f"company{index}.example.com",
+        )
+        for index in range(lookups)
+    ]
+
+    try:
+        start = time.perf_counter()
+        await client.ensure_initialized()
+        startup_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        found = [
+            company async for company in get_apollo_emails(companies, client)
+        ]
+        seconds = time.perf_counter() - start
+    finally:
+        await client.close()
+
+    return {
+        "lookups": lookups,
+        "contacts_found": len(found),
+        "tabs": tabs,
+        "startup_seconds": round(startup_seconds, 3),
+        "seconds": round(seconds, 3),
+        "lookups_per_sec": _rate(lookups, seconds),
+    }
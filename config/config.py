@@ -1,11 +1,103 @@
 # Outreach Details
 OUR_NAME = "Brian Can"  # Replace with your actual name
 
+# Scraping Browsers
+BROWSER_CONFIG = {
+    "headless": False,  # Hide Chrome, turn on once the profiles hold a login and solved CAPTCHA
+    "profile_dir": "browser_profiles",  # Folder keeping each browser's cookies between runs, None for temporary profiles
+    "block_resources": True,  # Skip loading the resource types and third-party hosts below
+    "blocked_types": ["Image", "Media", "Font"],  # CDP resource types never loaded
+    "block_third_party": True,  # Block requests to the third-party hosts below
+    "blocked_hosts": [  # Analytics, ad and chat widget hosts never loaded, subdomains included
+        "google-analytics.com",
+        "googletagmanager.com",
+        "doubleclick.net",
+        "googlesyndication.com",
+        "facebook.net",
+        "segment.io",
+        "hotjar.com",
+        "fullstory.com",
+        "mixpanel.com",
+        "amplitude.com",
+        "heapanalytics.com",
+        "clarity.ms",
+        "intercom.io",
+        "intercomcdn.com",
+    ],
+    "health_check_interval": 30,  # Seconds between browser health checks, None to turn them off
+    "trace_dir": None,  # Folder to write a Chrome trace of every CDP command to, None to turn tracing off
+}
+
 # Wellfound Filters
 WELLFOUND_CONFIG = {
     "job_titles": ["data science", "software engineer"],
     "locations": ["san diego"],
     "max_company_size": 100,
     "base_url": "https://wellfound.com",
-    "is_test_mode" : True
+    "is_test_mode" : True,
+    "profile_tabs": 4,  # Browser tabs used to fetch company profiles in parallel
+    "max_requests_per_host": 4,  # Max concurrent page loads against one host
+    "search_tabs": 2,  # Search pages scraped in parallel
+    "max_in_flight": 6,  # Global cap on page loads in progress at once
+    "page_timeout": 30,  # Seconds before giving up on a page that never loads
+    "extraction_mode": "network",  # "network" reads page JSON, "dom" scrapes HTML
+    "workers": 1,  # Browser processes the searches are split across
+    "pagination": "pages",  # "pages" follows ?page=N links, "scroll" scrolls to load more
+    "max_pages": 5,  # Max result pages (or scroll loads) crawled per search
+    "max_results": None,  # Max results read per search, None for no limit
+    "scroll_timeout": 5,  # Seconds to wait for more results after scrolling
+    "incremental": True,  # Stop at results crawled in the last run of a search
+    "search_state_size": 10,  # Top results remembered per search
+}
+
+# Apollo Lookups
+APOLLO_CONFIG = {
+    "tabs": 3,  # Logged in tabs used for concurrent lookups
+    "base_url": "https://app.apollo.io",  # Apollo web app address
+    "requests_per_minute": 30,  # Ceiling on Apollo searches started per minute
+    "cache_hit_ttl_days": 90,  # Days a found contact is reused before re-querying
+    "cache_miss_ttl_days": 14,  # Days before a domain without contacts is retried
+    "cache_memory_size": 1024,  # Domains kept in the in-memory cache
+    "results_timeout": 2,  # Seconds to wait for search results or an empty state
+    "email_timeout": 10,  # Seconds to wait for an email after "Access email"
+    "login_timeout": 600,  # Seconds allowed for the manual Apollo login
+    "extraction_mode": "network",  # "network" reads search JSON, "dom" scrapes HTML
+}
+
+# Streaming pipeline between the scrape, enrich and send stages
+PIPELINE_CONFIG = {
+    "queue_size": 20,  # Max companies waiting between two stages
+    "enrich_workers": 3,  # Concurrent Apollo lookups, match APOLLO_CONFIG tabs
+    "send_workers": 2,  # Concurrent email senders, match EMAIL_CONFIG connections
+}
+
+# Email Sending
+EMAIL_CONFIG = {
+    "connections": 2,  # SMTP connections and sender threads
+    "per_minute_limit": 20,  # Max emails per minute for the account
+    "daily_limit": 500,  # Max emails per day, Gmail caps regular accounts at 500
+    "max_retries": 3,  # Retries for dropped connections and temporary errors
+    "retry_backoff": 2.0,  # Seconds before the first retry, doubled each time
+}
+
+# Request rates, adapted to each site: sped up while requests succeed and
+# slowed down on 429 responses, CAPTCHA pages or runs of empty results
+THROTTLE_CONFIG = {
+    "enabled": True,  # Turn off to send requests as fast as the stages allow
+    "start_per_minute": 60,  # Starting requests per minute for each host, split between Wellfound workers
+    "min_per_minute": 6,  # Slowest rate throttling can bring a host down to
+    "max_per_minute": 600,  # Fastest rate, Apollo and email are also capped by their own limits
+    "increase_per_minute": 6,  # Added to a host's rate after each success
+    "decrease_factor": 0.5,  # A host's rate is multiplied by this when it throttles
+    "empty_threshold": 5,  # Empty results in a row taken as a sign of throttling
+    "failure_threshold": 5,  # Failures in a row that pause requests to a host
+    "pause_seconds": 60,  # First pause, doubled while the host keeps failing
+    "max_pause_seconds": 900,  # Longest pause
+}
+
+# Timers and counters for page loads, selector waits, Apollo lookups and sends
+METRICS_CONFIG = {
+    "prometheus_port": None,  # Serve http://127.0.0.1:<port>/metrics during runs
+    "jsonl_path": None,  # Append every metric to this JSONL file after each run
+    "summary": True,  # Log a table of the timers and counters after each run
 }
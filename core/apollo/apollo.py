@@ -1,46 +1,163 @@
+import sys
+import os
+import asyncio
 import nodriver as uc
-import pandas as pd
-from typing import Optional
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+from dataclasses import dataclass, field
 import logging
 
-# Configure logging
+sys.path.append(
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+)
+
+from core.apollo.cache import ContactCache
+from core.browser.network import ResponseCapture, iter_dicts
+from core.browser.manager import BrowserManager
+from core.browser import tracing
+from core.browser.profile import BrowserProfile, get_browser_profile
+from core.browser.waits import Condition, wait_for_any
+from core.pipeline.records import CompanyRecord
+from utils.metrics import metrics
+from utils.rate_limit import Throttled, throttles
+from config.config import APOLLO_CONFIG
+
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.INFO)
 
-# Create console handler with formatting
-console_handler = logging.StreamHandler()
-console_handler.setLevel(logging.INFO)
-formatter = logging.Formatter(
-    "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
-console_handler.setFormatter(formatter)
-logger.addHandler(console_handler)
+# Page states raced against each other while waiting on the people search
+RESULTS_CONDITIONS = {
+    "results": Condition(selector="div.zp_hWv1I"),
+    "empty": Condition(texts=("No people match your criteria",)),
+    "error": Condition(texts=("Something went wrong",)),
+}
+
+# People searches are answered by XHRs under this path
+APOLLO_API_PATTERN = r"/api/v1/"
+
+
+def parse_people(payload: Any) -> Optional[Tuple[Optional[str], Optional[str]]]:
+    """Extract the first person from a captured Apollo search payload.
+
+    Returns (name, email) with email None while it is still locked,
+    (None, None) for a search without results, and None for other payloads.
+    """
+    for item in iter_dicts(payload):
+        if "pagination" not in item:
+            continue
+        people = (item.get("contacts") or []) + (item.get("people") or [])
+        if not people:
+            return None, None
+
+        person = people[0]
+        email = person.get("email")
+        if not email or "@" not in email or "not_unlocked" in email:
+            email = None
+        return person.get("name"), email
+    return None
+
+
+@dataclass
+class ApolloConfig:
+    """Configuration settings for the Apollo client."""
+
+    tabs: int = 1
+    base_url: str = "https://app.apollo.io"
+    requests_per_minute: Optional[float] = None
+    results_timeout: float = 2
+    email_timeout: float = 10
+    login_timeout: float = 600
+    extraction_mode: str = "dom"
+    browser: BrowserProfile = field(default_factory=BrowserProfile)
 
 
 class ApolloClient:
-    def __init__(self):
+    def __init__(
+        self,
+        config: Optional[ApolloConfig] = None,
+        cache: Optional[ContactCache] = None,
+        manager: Optional[BrowserManager] = None,
+    ):
+        self.config = config or ApolloConfig()
+        # Without a shared browser manager the client starts its own browser
+        self.owns_manager = manager is None
+        self.manager = manager or BrowserManager(
+            self.config.browser, name="apollo"
+        )
         self.browser = None
         self.page = None
+        self.tab_pool = None
+        # Shared with the tab pool, which waits for it before each search
+        self.throttle = throttles.get(
+            urlparse(self.config.base_url).netloc,
+            max_per_minute=self.config.requests_per_minute,
+        )
+        self.cache = cache
+        self._ready = None
+
+    def initialize_in_background(self) -> None:
+        """Start logging in without waiting, lookups wait for it to finish."""
+        if self._ready is None:
+            self._ready = asyncio.create_task(self.initialize())
+
+    async def ensure_initialized(self) -> None:
+        """Start the browser and log in once, on the first call."""
+        self.initialize_in_background()
+        await self._ready
 
     async def initialize(self) -> None:
-        """Initialize the browser and login to Apollo."""
+        """Initialize the browser and login to Apollo.
+
+        With a persistent browser profile the saved session is reused, and
+        the login page goes straight to the app.
+        """
         logger.info("Initializing Apollo client")
-        self.browser = await uc.start(no_sandbox=True)
-        self.page = await self.browser.get("https://app.apollo.io/#/login")
+        await self._open_session(await self.manager.start())
+        # Tabs of one browser share the logged in session cookies
+        self.tab_pool = self.manager.tab_pool(size=self.config.tabs)
+        self.manager.add_restart_callback(self._open_session)
+
+    async def _open_session(self, browser: uc.Browser) -> None:
+        """Open the login page in browser and log in, again after a restart.
+
+        A restarted browser has lost the old page, and its session too
+        unless the profile kept the cookies.
+        """
+        self.browser = browser
+        self.page = await browser.get(
+            f"{self.config.base_url}/#/login", new_tab=not self.owns_manager
+        )
         await self._login()
 
     async def _login(self) -> None:
         """Handle Apollo login process."""
         logger.info("Attempting to log in to Apollo")
+        logged_in = Condition(texts=("Quick search",))
         try:
-            await self.page.wait_for(
-                selector='input[name="email"]', timeout=float("inf")
+            outcome = await wait_for_any(
+                self.page,
+                {
+                    "logged_in": logged_in,
+                    "login_form": Condition(selector='input[name="email"]'),
+                },
+                timeout=self.config.login_timeout,
             )
-            login_email = await self.page.select(
-                'button[class="zp-button zp_GGHzP zp_Kbe5T zp_PLp2D zp_rduLJ zp_g5xYz"]'
-            )
-            await login_email.click()
-            await self.page.wait_for(text="Quick search", timeout=float("inf"))
+            if outcome == "login_form" and self.config.browser.headless:
+                raise RuntimeError(
+                    "Apollo session expired, run once with headless off "
+                    "to log in again"
+                )
+            if outcome == "login_form":
+                login_email = await self.page.select(
+                    'button[class="zp-button zp_GGHzP zp_Kbe5T zp_PLp2D zp_rduLJ zp_g5xYz"]'
+                )
+                await login_email.click()
+                outcome = await wait_for_any(
+                    self.page,
+                    {"logged_in": logged_in},
+                    timeout=self.config.login_timeout,
+                )
+            if outcome != "logged_in":
+                raise TimeoutError("Timed out waiting for Apollo login")
             logger.info("Successfully logged in to Apollo")
         except Exception as e:
             logger.error(
@@ -48,21 +165,51 @@ class ApolloClient:
             )
             raise
 
-    async def _extract_contact_info(self) -> Optional[tuple[str, str]]:
-        """Extract name and email from the first person in the search results."""
+    async def _extract_contact_info(
+        self, page: uc.Tab, capture: Optional[ResponseCapture] = None
+    ) -> Optional[tuple[str, str]]:
+        """Extract name and email from the first person in the search results.
+
+        Returns (None, None) when the search has no results, and None when
+        the results timed out or the page errored and the result should not
+        be trusted.
+
+        Raises:
+            Throttled: If Apollo answered with a throttling status or its
+                error page
+        """
         try:
-            try:
-                # Check for results first since it's more common
-                first_person = await self.page.wait_for(
-                    selector="div.zp_hWv1I", timeout=2
+            if capture:
+                person = await capture.wait_for(
+                    parse_people, timeout=self.config.results_timeout
                 )
-            except Exception:
+                if person == (None, None):
+                    logger.debug("No contact found")
+                    return None, None
+                if person and person[1]:
+                    logger.debug(
+                        f"Extracted contact info from search payload: {person[0]}"
+                    )
+                    return person
+                # A locked email still needs the "Access email" button below
+
+            outcome = await wait_for_any(
+                page, RESULTS_CONDITIONS, timeout=self.config.results_timeout
+            )
+            if outcome == "error":
+                logger.warning("Apollo search page returned an error")
+                raise Throttled("error_page")
+            if outcome == "empty":
                 # No contact found
                 logger.debug("No contact found")
                 return None, None
+            if outcome is None:
+                # A slow page proves nothing, so the miss is not cached
+                logger.warning("Timed out waiting for Apollo search results")
+                return None
 
             # Get all people and select the first one
-            first_person = await self.page.query_selector_all("div.zp_hWv1I")
+            first_person = await page.query_selector_all("div.zp_hWv1I")
             first_person = first_person[1]
 
             # Extract name from first person
@@ -79,8 +226,10 @@ class ApolloClient:
                 logger.debug("Found Access email button, clicking it")
                 await get_email.click()
                 # Wait for email to appear after clicking
-                await self.page.wait_for(
-                    selector="span.zp_xvo3G.zp_JTaUA", timeout=10
+                await wait_for_any(
+                    page,
+                    {"email": Condition(selector="span.zp_xvo3G.zp_JTaUA")},
+                    timeout=self.config.email_timeout,
                 )
 
             # Now try to get the email element (either direct or after clicking)
@@ -108,19 +257,30 @@ class ApolloClient:
                 )
 
             return name, email
+        except Throttled:
+            raise
         except Exception as e:
             logger.error(
                 f"Error extracting contact info: {str(e)}", exc_info=True
             )
-            return None, None
+            return None
 
     async def get_company_contacts(
         self, company_domain: str
     ) -> Optional[tuple[str, str]]:
         """Search for and retrieve contact information for the first person found for a company."""
+        if self.cache:
+            cached = self.cache.get(company_domain)
+            if cached:
+                metrics.increment("apollo_cache", result="hit")
+                logger.info(f"Using cached contacts for domain: {company_domain}")
+                return cached
+            metrics.increment("apollo_cache", result="miss")
+
+        await self.ensure_initialized()
         logger.info(f"Searching for contacts at domain: {company_domain}")
         search_url = (
-            "https://app.apollo.io/#/people"
+            f"{self.config.base_url}/#/people"
             "?sortAscending=false"
             "&sortByField=person_title_normalized"
             "&contactEmailStatusV2%5B%5D=verified"
@@ -130,60 +290,185 @@ class ApolloClient:
             "&personDepartmentOrSubdepartments%5B%5D=operations_executive"
             f"&page=1&qKeywords={company_domain}"
         )
-        await self.page.get(url=search_url)
-        return await self._extract_contact_info()
+        capture = None
+        if self.config.extraction_mode == "network":
+            capture = ResponseCapture(APOLLO_API_PATTERN)
+
+        with metrics.timer("apollo_lookup_seconds") as labels:
+            labels["outcome"] = "error"
+            async with self.tab_pool.open(
+                search_url, prepare=capture.attach if capture else None
+            ) as page:
+                try:
+                    with tracing.span(page, "contact extraction"):
+                        contact = await self._extract_contact_info(
+                            page, capture
+                        )
+                    if contact is None:
+                        status = capture.throttled_status if capture else None
+                        if status:
+                            raise Throttled(f"status_{status}")
+                        self.throttle.failure("inconclusive")
+                except Throttled as e:
+                    logger.warning(f"{e} looking up {company_domain}")
+                    self.throttle.throttled(e.reason)
+                    contact = None
+                finally:
+                    if capture:
+                        await capture.detach()
+            if contact is None:
+                labels["outcome"] = "inconclusive"
+            else:
+                labels["outcome"] = "found" if all(contact) else "no_contact"
+
+        if contact is None:
+            # Inconclusive lookups are not cached so they are retried
+            metrics.increment("apollo_failures", reason="inconclusive")
+            return None, None
+
+        if all(contact):
+            self.throttle.success()
+        else:
+            # A run of searches without results is Apollo throttling quietly
+            self.throttle.empty()
+
+        name, email = contact
+        if self.cache:
+            self.cache.put(company_domain, name, email)
+        return name, email
+
+    async def _lookup(
+        self, company_domain: str
+    ) -> Tuple[str, Tuple[Optional[str], Optional[str]]]:
+        """Look up one domain, logging failures instead of raising."""
+        try:
+            return company_domain, await self.get_company_contacts(
+                company_domain
+            )
+        except Exception as e:
+            logger.error(
+                f"Error looking up contacts for {company_domain}", exc_info=True
+            )
+            metrics.increment("apollo_failures", reason=type(e).__name__)
+            return company_domain, (None, None)
+
+    async def get_company_contacts_many(
+        self, company_domains: Iterable[str]
+    ) -> AsyncIterator[Tuple[str, Tuple[Optional[str], Optional[str]]]]:
+        """Look up many domains across the tab pool, yielding as each finishes.
+
+        Concurrency is bounded by the number of tabs and the request rate by
+        the client's requests-per-minute ceiling.
+        """
+        tasks = [
+            asyncio.create_task(self._lookup(domain))
+            for domain in dict.fromkeys(company_domains)
+        ]
+        try:
+            for next_lookup in asyncio.as_completed(tasks):
+                yield await next_lookup
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def enrich_company(
+        self, company: CompanyRecord
+    ) -> Optional[CompanyRecord]:
+        """Return the company with contact_name and email added, or None."""
+        name, email = await self.get_company_contacts(company.website)
+        if not (name and email):
+            logger.warning(f"No contact found for {company.website}")
+            return None
+
+        logger.info(f"Found contact for {company.website}: {name}")
+        return company.with_contact(name, email)
 
     async def close(self) -> None:
         """Clean up browser resources."""
         logger.info("Closing Apollo client")
+        if self._ready and not self._ready.done():
+            self._ready.cancel()
+        self.manager.remove_restart_callback(self._open_session)
+        if self.tab_pool:
+            await self.manager.close_pool(self.tab_pool)
         if self.page:
             await self.page.close()
-        if self.browser:
-            self.browser.stop()
+        if self.owns_manager:
+            await self.manager.close()
+
+
+def get_apollo_client(
+    manager: Optional[BrowserManager] = None,
+) -> ApolloClient:
+    """Build an Apollo client from config.py, in manager's browser if given."""
+    return ApolloClient(
+        config=ApolloConfig(
+            tabs=APOLLO_CONFIG.get("tabs", 1),
+            base_url=APOLLO_CONFIG.get("base_url", "https://app.apollo.io"),
+            requests_per_minute=APOLLO_CONFIG.get("requests_per_minute"),
+            results_timeout=APOLLO_CONFIG.get("results_timeout", 2),
+            email_timeout=APOLLO_CONFIG.get("email_timeout", 10),
+            login_timeout=APOLLO_CONFIG.get("login_timeout", 600),
+            extraction_mode=APOLLO_CONFIG.get("extraction_mode", "dom"),
+            browser=get_browser_profile(),
+        ),
+        cache=ContactCache(
+            hit_ttl_days=APOLLO_CONFIG.get("cache_hit_ttl_days", 90),
+            miss_ttl_days=APOLLO_CONFIG.get("cache_miss_ttl_days", 14),
+            memory_size=APOLLO_CONFIG.get("cache_memory_size", 1024),
+        ),
+        manager=manager,
+    )
+
 
+async def get_apollo_emails(
+    companies: Iterable[CompanyRecord],
+    client: Optional[ApolloClient] = None,
+) -> AsyncIterator[CompanyRecord]:
+    """Look up contacts for companies, yielding each one that has a contact.
 
-async def get_apollo_emails(wellfound_output_df: pd.DataFrame) -> pd.DataFrame:
-    """Process companies and retrieve contact information using Apollo."""
+    Companies are yielded as their lookups finish, companies sharing a
+    website are looked up once. The client is built from config.py unless
+    one is given, and only a client built here is closed.
+    """
+    by_website: Dict[str, List[CompanyRecord]] = {}
+    for company in companies:
+        by_website.setdefault(company.website, []).append(company)
+    total_companies = sum(len(group) for group in by_website.values())
     logger.info(
-        f"Starting Apollo email retrieval for {len(wellfound_output_df)} companies"
+        f"Starting Apollo email retrieval for {total_companies} companies"
     )
-    client = ApolloClient()
-    await client.initialize()
+    # The browser is only started once a domain misses the contact cache
+    owns_client = client is None
+    if owns_client:
+        client = get_apollo_client()
 
+    successful_lookups = 0
     try:
-        successful_lookups = 0
-        for index, row in wellfound_output_df.iterrows():
-            company_website = row["website"]
+        processed = 0
+        async for company_website, (name, email) in (
+            client.get_company_contacts_many(by_website)
+        ):
+            processed += 1
             logger.info(
-                f"Processing company {index + 1}/{len(wellfound_output_df)}: {company_website}"
+                f"Processed website {processed}/{len(by_website)}: {company_website}"
             )
-
-            name, email = await client.get_company_contacts(row["website"])
-            if name and email:
-                wellfound_output_df.at[index, "contact_name"] = name
-                wellfound_output_df.at[index, "email"] = email
-                successful_lookups += 1
-                logger.info(f"Found contact for {company_website}: {name}")
-            else:
+            if not (name and email):
                 logger.warning(f"No contact found for {company_website}")
+                continue
 
-        if not wellfound_output_df.empty:
-            initial_count = len(wellfound_output_df)
-            wellfound_output_df.dropna(subset=["email"], inplace=True)
-            final_count = len(wellfound_output_df)
-            logger.info(
-                f"Email retrieval complete. Success rate: {successful_lookups}/{initial_count} companies"
-            )
-            logger.info(
-                f"Removed {initial_count - final_count} companies without contact information"
-            )
+            logger.info(f"Found contact for {company_website}: {name}")
+            for company in by_website[company_website]:
+                successful_lookups += 1
+                yield company.with_contact(name, email)
 
     except Exception:
         logger.error("Error during Apollo email retrieval", exc_info=True)
         raise
     finally:
-        await client.close()
-
-    wellfound_output_df.reset_index(inplace=True)
+        if owns_client:
+            await client.close()
 
-    return wellfound_output_df
+    logger.info(
+        f"Email retrieval complete. Success rate: {successful_lookups}/{total_companies} companies"
+    )
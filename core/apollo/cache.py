@@ -0,0 +1,82 @@
+import sys
+import os
+import datetime
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+sys.path.append(
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+)
+
+from core.database.sqlite import cache_contact, get_cached_contact
+
+
+class ContactCache:
+    """Apollo lookups keyed by domain, kept in SQLite with an LRU in front.
+
+    Hits and misses expire after their own TTLs, so domains without a contact
+    are retried eventually but not on every run.
+    """
+
+    def __init__(
+        self,
+        hit_ttl_days: float = 90,
+        miss_ttl_days: float = 14,
+        memory_size: int = 1024,
+    ):
+        self.hit_ttl = datetime.timedelta(days=hit_ttl_days)
+        self.miss_ttl = datetime.timedelta(days=miss_ttl_days)
+        self.memory_size = memory_size
+        self._memory: OrderedDict = OrderedDict()
+
+    def _expired(self, looked_up_at: datetime.datetime, hit: bool) -> bool:
+        ttl = self.hit_ttl if hit else self.miss_ttl
+        return datetime.datetime.now() - looked_up_at > ttl
+
+    def _remember(
+        self,
+        domain: str,
+        contact: Tuple[Optional[str], Optional[str]],
+        looked_up_at: datetime.datetime,
+    ) -> None:
+        self._memory[domain] = (contact, looked_up_at)
+        self._memory.move_to_end(domain)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def get(self, domain: str) -> Optional[Tuple[Optional[str], Optional[str]]]:
+        """Get a fresh (contact_name, email) for domain, or None if not cached.
+
+        A cached miss is returned as (None, None).
+        """
+        if domain in self._memory:
+            contact, looked_up_at = self._memory[domain]
+            if not self._expired(looked_up_at, all(contact)):
+                self._memory.move_to_end(domain)
+                return contact
+            del self._memory[domain]
+
+        cached = get_cached_contact(domain)
+        if not cached:
+            return None
+
+        looked_up_at = datetime.datetime.fromisoformat(cached["looked_up_at"])
+        if self._expired(looked_up_at, cached["hit"]):
+            return None
+
+        contact = (cached["contact_name"], cached["email"])
+        self._remember(domain, contact, looked_up_at)
+        return contact
+
+    def put(
+        self, domain: str, contact_name: Optional[str], email: Optional[str]
+    ) -> None:
+        """Store the result of a lookup in both layers."""
+        looked_up_at = datetime.datetime.now()
+        self._remember(domain, (contact_name, email), looked_up_at)
+        cache_contact(
+            domain,
+            contact_name,
+            email,
+            looked_up_at.isoformat(timespec="seconds"),
+        )
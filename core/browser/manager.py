@@ -0,0 +1,259 @@
+import os
+import json
+import time
+import asyncio
+import logging
+import tempfile
+from contextlib import suppress
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import nodriver as uc
+from nodriver import cdp
+
+from core.browser import tracing
+from core.browser.pool import TabPool
+from core.browser.profile import BrowserProfile
+
+logger = logging.getLogger(__name__)
+
+# Where a running browser daemon publishes its debugging address
+DAEMON_FILE = "browser_daemon.json"
+
+# Seconds a browser or tab may take to answer a health check
+HEALTH_CHECK_TIMEOUT = 5
+
+
+def daemon_path(profile: BrowserProfile) -> str:
+    """Get the file a browser daemon for this profile writes its address to."""
+    return os.path.join(
+        profile.profile_dir or tempfile.gettempdir(), DAEMON_FILE
+    )
+
+
+def read_daemon_address(profile: BrowserProfile) -> Optional[Dict]:
+    """Get the host and port of a running browser daemon, None without one."""
+    try:
+        with open(daemon_path(profile)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class BrowserManager:
+    """Owns one browser shared by the Wellfound and Apollo stages.
+
+    Each stage gets its own tab pools from the manager, so one Chrome
+    startup serves the whole run. Both sites share the browser's default
+    context, which keeps the persistent profile's cookies, and cookies are
+    already kept apart by domain.
+
+    A background task checks the browser is still answering and restarts
+    it when it isn't, rebuilding every pool on the new browser and calling
+    back stages that keep state in it, such as a login. When a
+    browser daemon is running (see serve), the manager connects to it
+    instead of starting Chrome, and leaves it running on close.
+
+    With the profile's trace_dir set, every CDP command sent to the
+    browser is traced and the trace is written there on close.
+    """
+
+    def __init__(self, profile: BrowserProfile, name: str = "shared"):
+        self.profile = profile
+        self.name = name
+        self.browser = None
+        self.owns_browser = True
+        self._pools: List[TabPool] = []
+        self._restart_callbacks: List[
+            Callable[[uc.Browser], Awaitable[None]]
+        ] = []
+        self._lock = asyncio.Lock()
+        self._watcher = None
+        self._serving = False
+        self.tracer: Optional[tracing.CDPTracer] = None
+
+    async def start(self) -> uc.Browser:
+        """Start or connect to the browser once, on the first call."""
+        async with self._lock:
+            if self.browser is None:
+                if self.profile.trace_dir and self.tracer is None:
+                    self._start_tracing()
+                self.browser = await self._launch()
+                if self.profile.health_check_interval and not self._watcher:
+                    self._watcher = asyncio.create_task(self._watch())
+        return self.browser
+
+    def _start_tracing(self) -> None:
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        self.tracer = tracing.CDPTracer(
+            os.path.join(
+                self.profile.trace_dir,
+                f"{self.name}-{stamp}-{os.getpid()}.json",
+            )
+        )
+        tracing.install(self.tracer)
+
+    def _stop_tracing(self) -> None:
+        tracing.uninstall(self.tracer)
+        try:
+            path = self.tracer.write()
+            logger.info(
+                f"CDP commands of the {self.name} browser:\n"
+                f"{self.tracer.summary_table()}"
+            )
+            logger.info(f"Trace written to {path}")
+        except OSError as e:
+            logger.error(f"Failed to write trace: {str(e)}")
+        self.tracer = None
+
+    async def _launch(self) -> uc.Browser:
+        """Connect to a running daemon, or start a browser of our own."""
+        browser = await self._connect_or_start()
+        if self.tracer:
+            self.tracer.watch(browser)
+        return browser
+
+    async def _connect_or_start(self) -> uc.Browser:
+        address = None if self._serving else read_daemon_address(self.profile)
+        if address:
+            try:
+                browser = await uc.start(
+                    host=address["host"], port=address["port"]
+                )
+                self.owns_browser = False
+                logger.info(
+                    f"Connected to the browser daemon at "
+                    f"{address['host']}:{address['port']}"
+                )
+                return browser
+            except Exception as e:
+                logger.warning(
+                    f"Browser daemon isn't answering, starting a browser: "
+                    f"{str(e)}"
+                )
+
+        self.owns_browser = True
+        browser = await self.profile.start(self.name)
+        if self._serving:
+            self._write_address(browser)
+        return browser
+
+    def tab_pool(
+        self,
+        size: int,
+        per_host_limit: Optional[int] = None,
+        request_slots: Optional[asyncio.Semaphore] = None,
+        host_slots: Optional[Dict[str, asyncio.Semaphore]] = None,
+    ) -> TabPool:
+        """Create a pool of tabs in the shared browser, call after start."""
+        pool = TabPool(
+            self.browser,
+            size=size,
+            per_host_limit=per_host_limit,
+            request_slots=request_slots,
+            host_slots=host_slots,
+            setup_tab=self.profile.setup_tab,
+            health_check_timeout=HEALTH_CHECK_TIMEOUT,
+        )
+        self._pools.append(pool)
+        return pool
+
+    async def close_pool(self, pool: TabPool) -> None:
+        """Close a stage's pool, so restarts and close leave it alone."""
+        if pool in self._pools:
+            self._pools.remove(pool)
+        await pool.close()
+
+    def add_restart_callback(
+        self, callback: Callable[[uc.Browser], Awaitable[None]]
+    ) -> None:
+        """Call back with the new browser after every restart."""
+        self._restart_callbacks.append(callback)
+
+    def remove_restart_callback(
+        self, callback: Callable[[uc.Browser], Awaitable[None]]
+    ) -> None:
+        if callback in self._restart_callbacks:
+            self._restart_callbacks.remove(callback)
+
+    async def is_alive(self) -> bool:
+        """Check the browser still answers over the debugging connection."""
+        try:
+            await asyncio.wait_for(
+                self.browser.send(cdp.browser.get_version()),
+                HEALTH_CHECK_TIMEOUT,
+            )
+            return True
+        except Exception:
+            return False
+
+    async def restart(self) -> None:
+        """Replace the browser with a new one and rebuild every pool on it."""
+        logger.warning("Browser stopped responding, restarting it")
+        if self.owns_browser:
+            with suppress(Exception):
+                self.browser.stop()
+        self.browser = await self._launch()
+        for pool in self._pools:
+            pool.reset(self.browser)
+        for callback in self._restart_callbacks:
+            try:
+                await callback(self.browser)
+            except Exception as e:
+                logger.error(
+                    f"Failed to restore state after a restart: {str(e)}"
+                )
+
+    async def _watch(self) -> None:
+        """Restart the browser whenever a periodic health check fails."""
+        while True:
+            await asyncio.sleep(self.profile.health_check_interval)
+            if not await self.is_alive():
+                async with self._lock:
+                    try:
+                        await self.restart()
+                    except Exception as e:
+                        logger.error(f"Failed to restart browser: {str(e)}")
+
+    def _write_address(self, browser: uc.Browser) -> None:
+        path = daemon_path(self.profile)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(
+                {"host": browser.config.host, "port": browser.config.port}, f
+            )
+
+    async def serve(self) -> None:
+        """Keep the browser running for later runs to connect to.
+
+        The daemon's address is written next to the browser profiles, and
+        removed when the daemon stops.
+        """
+        self._serving = True
+        await self.start()
+        logger.info("Browser daemon running, press Ctrl+C to stop it")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await self.close()
+
+    async def close(self) -> None:
+        """Close the pools, and the browser unless it belongs to a daemon."""
+        if self._serving:
+            with suppress(OSError):
+                os.remove(daemon_path(self.profile))
+        if self._watcher:
+            self._watcher.cancel()
+            self._watcher = None
+        for pool in self._pools:
+            await pool.close()
+        self._pools.clear()
+        self._restart_callbacks.clear()
+        if self.browser and self.owns_browser:
+            logger.info("Closing browser")
+            self.browser.stop()
+        elif self.browser:
+            with suppress(Exception):
+                await self.browser.aclose()
+        self.browser = None
+        if self.tracer:
+            self._stop_tracing()
@@ -0,0 +1,155 @@
+import asyncio
+import base64
+import json
+import logging
+import re
+import time
+from typing import Any, Callable, Iterator, List, Optional
+
+import nodriver as uc
+from nodriver import cdp
+
+logger = logging.getLogger(__name__)
+
+# Server rendered pages embed their initial data in this script tag
+_NEXT_DATA = re.compile(
+    r'<script id="__NEXT_DATA__" type="application/json"[^>]*>(.*?)</script>',
+    re.DOTALL,
+)
+
+# Statuses sites answer with when they throttle or block a scraper
+THROTTLE_STATUSES = {403, 429, 503}
+
+_CAPTURED_TYPES = {
+    cdp.network.ResourceType.DOCUMENT,
+    cdp.network.ResourceType.XHR,
+    cdp.network.ResourceType.FETCH,
+}
+
+
+def iter_dicts(payload: Any) -> Iterator[dict]:
+    """Yield every dict nested anywhere inside a decoded JSON payload."""
+    stack = [payload]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, dict):
+            yield item
+            stack.extend(reversed(list(item.values())))
+        elif isinstance(item, list):
+            stack.extend(reversed(item))
+
+
+class ResponseCapture:
+    """Collects the JSON payloads a tab loads from URLs matching a pattern.
+
+    JSON responses are decoded as they are, and HTML documents contribute
+    their embedded __NEXT_DATA__ JSON. A throttling status from a matching
+    URL is kept in throttled_status.
+    """
+
+    def __init__(self, url_pattern: str):
+        self.url_pattern = re.compile(url_pattern)
+        self.payloads: List[Any] = []
+        self.throttled_status: Optional[int] = None
+        self._tab = None
+        self._pending = set()
+        self._received = asyncio.Event()
+
+    async def attach(self, tab: uc.Tab) -> None:
+        """Start capturing responses on tab, call before navigating it."""
+        self._tab = tab
+        tab.add_handler(cdp.network.ResponseReceived, self._on_response)
+        tab.add_handler(cdp.network.LoadingFinished, self._on_finished)
+        await tab.send(cdp.network.enable())
+
+    async def detach(self) -> None:
+        """Stop capturing responses and network events on the tab.
+
+        Pooled tabs are reused, so the Network domain is turned off again
+        rather than left sending events nobody handles.
+        """
+        if self._tab:
+            tab, self._tab = self._tab, None
+            tab.remove_handler(cdp.network.ResponseReceived, self._on_response)
+            tab.remove_handler(cdp.network.LoadingFinished, self._on_finished)
+            try:
+                await tab.send(cdp.network.disable())
+            except Exception as e:
+                logger.debug(f"Could not disable network events: {str(e)}")
+
+    def clear(self) -> None:
+        """Forget captured payloads, so later waits only see new ones."""
+        self.payloads.clear()
+        self._received.clear()
+
+    def _on_response(self, event: cdp.network.ResponseReceived) -> None:
+        if event.type_ in _CAPTURED_TYPES and self.url_pattern.search(
+            event.response.url
+        ):
+            if event.response.status in THROTTLE_STATUSES:
+                self.throttled_status = event.response.status
+            self._pending.add(event.request_id)
+
+    async def _on_finished(self, event: cdp.network.LoadingFinished) -> None:
+        if event.request_id not in self._pending or not self._tab:
+            return
+        self._pending.discard(event.request_id)
+
+        try:
+            body, is_base64 = await self._tab.send(
+                cdp.network.get_response_body(event.request_id)
+            )
+            if is_base64:
+                body = base64.b64decode(body).decode("utf-8", "replace")
+        except Exception as e:
+            logger.debug(f"Could not read response body: {str(e)}")
+            return
+
+        payload = self._decode(body)
+        if payload is not None:
+            self.payloads.append(payload)
+            self._received.set()
+
+    @staticmethod
+    def _decode(body: str) -> Optional[Any]:
+        """Decode a JSON body, or the __NEXT_DATA__ embedded in an HTML body."""
+        text = body.lstrip()
+        if not text.startswith(("{", "[")):
+            match = _NEXT_DATA.search(body)
+            if not match:
+                return None
+            text = match.group(1)
+        try:
+            return json.loads(text)
+        except ValueError:
+            return None
+
+    async def wait_for(
+        self, parse: Callable[[Any], Optional[Any]], timeout: float
+    ) -> Optional[Any]:
+        """Wait for a captured payload that parse turns into a result.
+
+        Args:
+            parse: Returns the extracted result for a payload, or None to skip it
+            timeout: Seconds to wait for a matching payload
+
+        Returns:
+            The first parsed result, or None if none arrived in time
+        """
+        deadline = time.monotonic() + timeout
+        checked = 0
+        while True:
+            while checked < len(self.payloads):
+                result = parse(self.payloads[checked])
+                checked += 1
+                if result is not None:
+                    return result
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            self._received.clear()
+            try:
+                await asyncio.wait_for(self._received.wait(), remaining)
+            except asyncio.TimeoutError:
+                return None
@@ -0,0 +1,152 @@
+import asyncio
+import logging
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+import nodriver as uc
+from nodriver import cdp
+
+from core.browser import tracing
+from utils.metrics import metrics
+from utils.rate_limit import throttles
+
+logger = logging.getLogger(__name__)
+
+
+def new_host_slots(limit: int) -> Dict[str, asyncio.Semaphore]:
+    """Create per-host semaphores allowing limit concurrent loads per host."""
+    return defaultdict(lambda: asyncio.Semaphore(limit))
+
+
+class TabPool:
+    """Pool of reusable browser tabs with a per-host concurrency cap.
+
+    Page loads also wait for their host's adaptive rate limit, which the
+    code reading the pages speeds up or slows down (see utils.rate_limit).
+    """
+
+    def __init__(
+        self,
+        browser: uc.Browser,
+        size: int,
+        per_host_limit: Optional[int] = None,
+        request_slots: Optional[asyncio.Semaphore] = None,
+        host_slots: Optional[Dict[str, asyncio.Semaphore]] = None,
+        setup_tab: Optional[Callable[[uc.Tab], Awaitable[None]]] = None,
+        health_check_timeout: Optional[float] = None,
+    ):
+        self.browser = browser
+        # Runs once on each tab the pool opens, e.g. to block resources
+        self.setup_tab = setup_tab
+        # Idle tabs are checked before being lent out when this is set
+        self.health_check_timeout = health_check_timeout
+        self.size = max(1, size)
+        self.per_host_limit = per_host_limit or self.size
+        # Shared between pools to cap in-flight page loads across a browser
+        self.request_slots = request_slots or asyncio.Semaphore(self.size)
+        self._idle: asyncio.Queue = asyncio.Queue()
+        self._tabs: List[uc.Tab] = []
+        # Also shared, so pools loading the same site respect one host cap
+        self.host_slots = (
+            host_slots
+            if host_slots is not None
+            else new_host_slots(self.per_host_limit)
+        )
+        self._create_lock = asyncio.Lock()
+
+    async def _acquire_tab(self) -> uc.Tab:
+        """Take an idle tab, opening a new one while under the pool size."""
+        while True:
+            if self._idle.empty():
+                async with self._create_lock:
+                    if self._idle.empty() and len(self._tabs) < self.size:
+                        tab = await self.browser.get(
+                            "about:blank", new_tab=True
+                        )
+                        if self.setup_tab:
+                            await self.setup_tab(tab)
+                        self._tabs.append(tab)
+                        logger.debug(
+                            f"Opened pooled tab {len(self._tabs)}/{self.size}"
+                        )
+                        return tab
+            tab = await self._idle.get()
+            if await self._is_healthy(tab):
+                return tab
+            logger.warning("Replacing a pooled tab that stopped responding")
+            metrics.increment("tab_replacements")
+            await self._discard(tab)
+
+    async def _is_healthy(self, tab: uc.Tab) -> bool:
+        """Check a tab still answers, e.g. that its renderer hasn't crashed."""
+        if self.health_check_timeout is None:
+            return True
+        try:
+            await asyncio.wait_for(
+                tab.send(cdp.runtime.evaluate("1")), self.health_check_timeout
+            )
+            return True
+        except Exception:
+            return False
+
+    async def _discard(self, tab: uc.Tab) -> None:
+        """Drop a tab from the pool so a new one is opened in its place."""
+        self._tabs.remove(tab)
+        try:
+            await asyncio.wait_for(tab.close(), self.health_check_timeout)
+        except Exception as e:
+            logger.debug(f"Error closing discarded tab: {str(e)}")
+
+    def reset(self, browser: uc.Browser) -> None:
+        """Forget every tab and open new ones in browser, after a restart."""
+        self.browser = browser
+        self._tabs.clear()
+        self._idle = asyncio.Queue()
+
+    @asynccontextmanager
+    async def open(
+        self,
+        url: str,
+        prepare: Optional[Callable[[uc.Tab], Awaitable[None]]] = None,
+    ) -> AsyncIterator[uc.Tab]:
+        """Navigate a pooled tab to url and lend it out for the block.
+
+        prepare runs on the tab before navigating, e.g. to start capturing
+        its network responses. The block reports to the host's throttle
+        whether the page loaded properly.
+        """
+        throttle = throttles.for_url(url)
+        await throttle.acquire()
+        with metrics.timer("tab_acquire_seconds"):
+            tab = await self._acquire_tab()
+        try:
+            if prepare:
+                await prepare(tab)
+            host = urlparse(url).netloc
+            async with self.host_slots[host]:
+                async with self.request_slots:
+                    with metrics.timer(
+                        "page_load_seconds", host=host
+                    ), tracing.span(tab, f"load {host}", url=url):
+                        try:
+                            await tab.get(url)
+                        except Exception:
+                            throttle.failure("page_load")
+                            raise
+            yield tab
+        finally:
+            # Tabs discarded or lost to a restart meanwhile aren't returned
+            if tab in self._tabs:
+                self._idle.put_nowait(tab)
+
+    async def close(self) -> None:
+        """Close every tab opened by the pool."""
+        for tab in self._tabs:
+            try:
+                await tab.close()
+            except Exception as e:
+                logger.debug(f"Error closing pooled tab: {str(e)}")
+        self._tabs.clear()
+        self._idle = asyncio.Queue()
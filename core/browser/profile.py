@@ -0,0 +1,152 @@
+import os
+import sys
+import logging
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import nodriver as uc
+from nodriver import cdp
+
+sys.path.append(
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+)
+
+from config.config import BROWSER_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# Resource types a scraper never reads
+DEFAULT_BLOCKED_TYPES = ("Image", "Media", "Font")
+
+# Third-party analytics, ad and chat widget hosts a scraper never needs,
+# subdomains included
+DEFAULT_BLOCKED_HOSTS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "googlesyndication.com",
+    "facebook.net",
+    "segment.io",
+    "hotjar.com",
+    "fullstory.com",
+    "mixpanel.com",
+    "amplitude.com",
+    "heapanalytics.com",
+    "clarity.ms",
+    "intercom.io",
+    "intercomcdn.com",
+)
+
+
+def _host_patterns(host: str) -> List[str]:
+    """Get the URL patterns matching a host and its subdomains."""
+    return [f"*://{host}/*", f"*://*.{host}/*"]
+
+
+@dataclass
+class BrowserProfile:
+    """How the scraping browsers are started and what their tabs load.
+
+    Profiles are kept in profile_dir, one folder per browser, so cookies
+    such as a solved CAPTCHA or an Apollo login survive between runs.
+    """
+
+    headless: bool = False
+    profile_dir: Optional[str] = None
+    block_resources: bool = True
+    blocked_types: Tuple[str, ...] = DEFAULT_BLOCKED_TYPES
+    block_third_party: bool = True
+    blocked_hosts: Tuple[str, ...] = DEFAULT_BLOCKED_HOSTS
+    health_check_interval: Optional[float] = 30
+    trace_dir: Optional[str] = None
+
+    def user_data_dir(self, name: str) -> Optional[str]:
+        """Get the profile folder of a named browser, None for a temporary one."""
+        if not self.profile_dir:
+            return None
+        path = os.path.abspath(os.path.join(self.profile_dir, name))
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def browser_args(self) -> List[str]:
+        """Get the extra Chrome flags of this profile."""
+        args = ["--mute-audio"]
+        if self.block_resources:
+            # Blocked images are never fetched, this skips decoding inline ones
+            args.append("--blink-settings=imagesEnabled=false")
+        return args
+
+    async def start(self, name: str) -> uc.Browser:
+        """Start a browser using the profile folder called name."""
+        return await uc.start(
+            no_sandbox=True,
+            headless=self.headless,
+            user_data_dir=self.user_data_dir(name),
+            browser_args=self.browser_args(),
+        )
+
+    async def setup_tab(self, tab: uc.Tab) -> None:
+        """Start blocking unneeded requests on a tab, call before navigating."""
+        if self.block_resources:
+            await ResourceBlocker(self).attach(tab)
+
+
+class ResourceBlocker:
+    """Fails a tab's requests for blocked resource types and third parties.
+
+    Only requests of the blocked types, or to the blocked third-party
+    hosts, are paused through CDP request interception, so every other
+    request loads without an extra round trip.
+    """
+
+    def __init__(self, profile: BrowserProfile):
+        self.patterns = [
+            cdp.fetch.RequestPattern(
+                resource_type=cdp.network.ResourceType.from_json(name)
+            )
+            for name in profile.blocked_types
+        ]
+        if profile.block_third_party:
+            self.patterns += [
+                cdp.fetch.RequestPattern(url_pattern=pattern)
+                for host in profile.blocked_hosts
+                for pattern in _host_patterns(host)
+            ]
+        self._tab = None
+
+    async def attach(self, tab: uc.Tab) -> None:
+        """Start intercepting the tab's blocked requests."""
+        if not self.patterns:
+            return
+        self._tab = tab
+        tab.add_handler(cdp.fetch.RequestPaused, self._on_paused)
+        await tab.send(cdp.fetch.enable(patterns=self.patterns))
+
+    async def _on_paused(self, event: cdp.fetch.RequestPaused) -> None:
+        try:
+            await self._tab.send(
+                cdp.fetch.fail_request(
+                    event.request_id,
+                    cdp.network.ErrorReason.BLOCKED_BY_CLIENT,
+                )
+            )
+        except Exception as e:
+            logger.debug(f"Could not fail intercepted request: {str(e)}")
+
+
+def get_browser_profile() -> BrowserProfile:
+    """Get the browser profile from config."""
+    return BrowserProfile(
+        headless=BROWSER_CONFIG.get("headless", False),
+        profile_dir=BROWSER_CONFIG.get("profile_dir"),
+        block_resources=BROWSER_CONFIG.get("block_resources", True),
+        blocked_types=tuple(
+            BROWSER_CONFIG.get("blocked_types", DEFAULT_BLOCKED_TYPES)
+        ),
+        block_third_party=BROWSER_CONFIG.get("block_third_party", True),
+        blocked_hosts=tuple(
+            BROWSER_CONFIG.get("blocked_hosts", DEFAULT_BLOCKED_HOSTS)
+        ),
+        health_check_interval=BROWSER_CONFIG.get("health_check_interval", 30),
+        trace_dir=BROWSER_CONFIG.get("trace_dir"),
+    )
@@ -0,0 +1,243 @@
+import os
+import json
+import time
+import logging
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Set
+
+import nodriver as uc
+from nodriver.core.connection import Connection
+
+logger = logging.getLogger(__name__)
+
+# Connection.send before tracing replaced it, None while nothing is traced
+_original_send = None
+
+# Tracers recording right now, one per traced browser manager
+_tracers: List["CDPTracer"] = []
+
+
+def _relay(cdp_obj, request: Dict, sizes: List[int]):
+    """Stand in for a CDP command generator, measuring its response.
+
+    nodriver sends the dict a command yields and sends the response back
+    into the generator, which parses it into the command's return value.
+    """
+    result = yield request
+    sizes.append(len(json.dumps(result)))
+    try:
+        cdp_obj.send(result)
+    except StopIteration as e:
+        return e.value
+
+
+async def _traced_send(self, cdp_obj, _attach: bool = False, **kwargs):
+    tracer = _tracer_for(self)
+    if tracer is None:
+        return await _original_send(self, cdp_obj, _attach, **kwargs)
+
+    request = next(cdp_obj)
+    sizes: List[int] = []
+    error = None
+    start = time.perf_counter()
+    try:
+        return await _original_send(
+            self, _relay(cdp_obj, request, sizes), _attach, **kwargs
+        )
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        tracer.record_command(
+            self,
+            request["method"],
+            start,
+            time.perf_counter(),
+            request_bytes=len(json.dumps(request.get("params", {}))),
+            response_bytes=sizes[0] if sizes else 0,
+            error=error,
+        )
+
+
+def _browser_of(connection: Connection) -> Optional[uc.Browser]:
+    if isinstance(connection, uc.Browser):
+        return connection
+    return getattr(connection, "browser", None)
+
+
+def _tracer_for(connection: Connection) -> Optional["CDPTracer"]:
+    browser = _browser_of(connection)
+    for tracer in _tracers:
+        if browser in tracer.browsers:
+            return tracer
+    return None
+
+
+def install(tracer: "CDPTracer") -> None:
+    """Start recording the CDP commands sent to the tracer's browsers."""
+    global _original_send
+    if _original_send is None:
+        _original_send = Connection.send
+        Connection.send = _traced_send
+    _tracers.append(tracer)
+
+
+def uninstall(tracer: "CDPTracer") -> None:
+    """Stop recording for the tracer, restoring send after the last one."""
+    global _original_send
+    if tracer in _tracers:
+        _tracers.remove(tracer)
+    if not _tracers and _original_send is not None:
+        Connection.send = _original_send
+        _original_send = None
+
+
+@contextmanager
+def span(connection: Connection, name: str, **args) -> Iterator[None]:
+    """Show the block as one slice on the tab's track, above its commands.
+
+    Does nothing unless the tab's browser is being traced.
+    """
+    tracer = _tracer_for(connection)
+    if tracer is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        tracer.record_span(connection, name, start, time.perf_counter(), args)
+
+
+class CDPTracer:
+    """Records every CDP command sent to a browser and its tabs.
+
+    Each command becomes a complete event with its duration and the size
+    of its parameters and response, on one track per tab, in the Chrome
+    trace format. Open the file in Perfetto (ui.perfetto.dev) or
+    chrome://tracing to see which calls a page load or lookup is made of.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.browsers: Set[uc.Browser] = set()
+        self.events: List[Dict] = []
+        self._start = time.perf_counter()
+        self._pid = os.getpid()
+        self._tracks: Dict[int, int] = {}
+        self._commands: Dict[str, List[float]] = defaultdict(
+            lambda: [0, 0.0, 0, 0]
+        )
+
+    def watch(self, browser: uc.Browser) -> None:
+        """Trace a browser, such as the one replacing a crashed browser."""
+        self.browsers.add(browser)
+
+    def _microseconds(self, seconds: float) -> float:
+        return round(seconds * 1_000_000, 1)
+
+    def _track(self, connection: Connection) -> int:
+        """Get the track of a connection, naming it the first time."""
+        key = id(connection)
+        if key not in self._tracks:
+            track = len(self._tracks) + 1
+            self._tracks[key] = track
+            if isinstance(connection, uc.Browser):
+                name = "browser"
+            else:
+                # Named by target ID, as in chrome://inspect
+                target = getattr(connection, "target", None)
+                target_id = getattr(target, "target_id", None) or track
+                name = f"tab {str(target_id)[:8]}"
+            self.events.append(
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": self._pid,
+                    "tid": track,
+                    "args": {"name": name},
+                }
+            )
+        return self._tracks[key]
+
+    def record_command(
+        self,
+        connection: Connection,
+        method: str,
+        start: float,
+        end: float,
+        request_bytes: int,
+        response_bytes: int,
+        error: Optional[str] = None,
+    ) -> None:
+        args = {"request_bytes": request_bytes, "response_bytes": response_bytes}
+        if error:
+            args["error"] = error
+        self.events.append(
+            {
+                "name": method,
+                "cat": "cdp",
+                "ph": "X",
+                "ts": self._microseconds(start - self._start),
+                "dur": self._microseconds(end - start),
+                "pid": self._pid,
+                "tid": self._track(connection),
+                "args": args,
+            }
+        )
+        totals = self._commands[method]
+        totals[0] += 1
+        totals[1] += end - start
+        totals[2] += request_bytes
+        totals[3] += response_bytes
+
+    def record_span(
+        self,
+        connection: Connection,
+        name: str,
+        start: float,
+        end: float,
+        args: Dict,
+    ) -> None:
+        self.events.append(
+            {
+                "name": name,
+                "cat": "scraper",
+                "ph": "X",
+                "ts": self._microseconds(start - self._start),
+                "dur": self._microseconds(end - start),
+                "pid": self._pid,
+                "tid": self._track(connection),
+                "args": {key: str(value) for key, value in args.items()},
+            }
+        )
+
+    def summary_table(self, limit: int = 15) -> str:
+        """Format the commands taking the most time in total as a table."""
+        rows = sorted(
+            self._commands.items(), key=lambda item: item[1][1], reverse=True
+        )[:limit]
+        width = max([len(method) for method, _ in rows] + [7])
+        lines = [
+            f"{'Command':<{width}} {'calls':>7} {'total s':>9} "
+            f"{'mean ms':>8} {'sent KB':>9} {'recv KB':>9}"
+        ]
+        for method, (calls, seconds, sent, received) in rows:
+            lines.append(
+                f"{method:<{width}} {calls:>7} {seconds:>9.2f} "
+                f"{seconds / calls * 1000:>8.1f} {sent / 1024:>9.1f} "
+                f"{received / 1024:>9.1f}"
+            )
+        return "\n".join(lines)
+
+    def write(self) -> str:
+        """Write the trace file, returning its path."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "w") as f:
+            json.dump(
+                {"traceEvents": self.events, "displayTimeUnit": "ms"}, f
+            )
+        return self.path
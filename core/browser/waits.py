@@ -0,0 +1,139 @@
+import asyncio
+import json
+import logging
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import nodriver as uc
+
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Condition:
+    """Something that can appear on a page, a CSS selector or any of some texts.
+
+    min_count requires at least that many elements matching selector, such
+    as to wait for more results after scrolling.
+    """
+
+    selector: Optional[str] = None
+    texts: Tuple[str, ...] = ()
+    min_count: int = 1
+
+
+# Resolves with the name of the first condition present on the page, checking
+# again on every DOM mutation, or with null once the deadline passes
+_WAIT_SCRIPT = """
+new Promise((resolve) => {
+    const conditions = %s;
+    const match = () => {
+        const text = document.body ? document.body.textContent : "";
+        for (const [name, selector, texts, minCount] of conditions) {
+            if (
+                selector &&
+                document.querySelectorAll(selector).length >= minCount
+            ) {
+                return name;
+            }
+            if (texts.some((t) => text.includes(t))) return name;
+        }
+        return null;
+    };
+    const found = match();
+    if (found) {
+        resolve(found);
+        return;
+    }
+    const observer = new MutationObserver(() => {
+        const found = match();
+        if (found) {
+            observer.disconnect();
+            clearTimeout(timer);
+            resolve(found);
+        }
+    });
+    const timer = setTimeout(() => {
+        observer.disconnect();
+        resolve(null);
+    }, %d);
+    observer.observe(document, {
+        childList: true,
+        subtree: true,
+        characterData: true,
+    });
+})
+"""
+
+
+async def wait_for_any(
+    tab: uc.Tab, conditions: Dict[str, Condition], timeout: float
+) -> Optional[str]:
+    """Wait until any condition appears on the page.
+
+    The check runs inside the page on DOM mutations, so it resolves as soon
+    as the page changes instead of polling over CDP.
+
+    Args:
+        tab: Tab to watch
+        conditions: Conditions keyed by the name to return when they match
+        timeout: Seconds to wait before giving up
+
+    Returns:
+        Name of the first matching condition, or None if none appeared in time
+    """
+    with metrics.timer("selector_wait_seconds") as labels:
+        outcome = await _wait_for_any(tab, conditions, timeout)
+        labels["outcome"] = outcome or "timeout"
+    return outcome
+
+
+async def _wait_for_any(
+    tab: uc.Tab, conditions: Dict[str, Condition], timeout: float
+) -> Optional[str]:
+    payload = json.dumps(
+        [
+            [
+                name,
+                condition.selector,
+                list(condition.texts),
+                condition.min_count,
+            ]
+            for name, condition in conditions.items()
+        ]
+    )
+    deadline = time.monotonic() + timeout
+
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return None
+
+        try:
+            result = await asyncio.wait_for(
+                tab.evaluate(
+                    _WAIT_SCRIPT % (payload, int(remaining * 1000)),
+                    await_promise=True,
+                    return_by_value=True,
+                ),
+                timeout=remaining + 1,
+            )
+        except asyncio.TimeoutError:
+            return None
+        except uc.ProtocolException as e:
+            # The page navigated and destroyed the script's context, try
+            # again in the new document
+            logger.debug(f"Wait interrupted, retrying: {str(e)}")
+            await asyncio.sleep(0.1)
+            continue
+
+        if isinstance(result, str):
+            return result
+        if isinstance(result, uc.cdp.runtime.ExceptionDetails):
+            logger.debug(f"Wait interrupted, retrying: {result.text}")
+            await asyncio.sleep(0.1)
+            continue
+        return None
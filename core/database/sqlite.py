@@ -1,19 +1,120 @@
 import sqlite3
 import datetime
+import json
 import os
-from typing import Tuple
+import atexit
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 from contextlib import contextmanager
 
+from utils.parse_company_size import parse_company_size
+
+
+# Statements are kept as constants so the connection's statement cache
+# reuses the compiled versions across calls
+INSERT_SEEN_SQL = """
+    INSERT OR IGNORE INTO companies_seen 
+    (company_name, description, job_type, size, size_min, size_max, location,
+    website, date_seen)
+    VALUES (:company_name, :description, :job_type, :size, :size_min,
+            :size_max, :location, :website, :date_seen)
+"""
+
+INSERT_SENT_SQL = """
+    INSERT OR IGNORE INTO companies_sent 
+    (contactee_name, status, company_name, description, job_type, size, 
+    size_min, size_max, location, website, contact_name, email, variant,
+    date_sent)
+    VALUES (:contactee_name, :status, :company_name, :description, :job_type,
+            :size, :size_min, :size_max, :location, :website, :contact_name,
+            :email, :variant, :date_sent)
+"""
+
+SELECT_SEEN_SQL = "SELECT 1 FROM companies_seen WHERE company_name = ?"
+
+SELECT_SENT_SQL = "SELECT 1 FROM companies_sent WHERE company_name = ?"
+
+# A page of candidates is joined against companies_seen in one query, which
+# returns the new ones in page order and whether each is within the size limit
+FILTER_CANDIDATES_SQL = """
+    SELECT
+        candidate.position,
+        :max_size IS NULL OR COALESCE(
+            candidate.size_min <= :max_size
+            AND candidate.size_max IS NOT NULL,
+            0
+        )
+    FROM temp.candidates AS candidate
+    WHERE NOT EXISTS (
+        SELECT 1 FROM companies_seen AS seen
+        WHERE seen.company_name = candidate.company_name
+    )
+    ORDER BY candidate.position
+"""
+
+UPSERT_STAGE_SQL = """
+    INSERT INTO pipeline_state 
+    (company_name, stage, website, description, job_type, size, location,
+    contact_name, email, error, updated_at)
+    VALUES (:company_name, :stage, :website, :description, :job_type, :size,
+            :location, :contact_name, :email, :error, :updated_at)
+    ON CONFLICT(company_name) DO UPDATE SET
+        stage = excluded.stage,
+        contact_name = COALESCE(excluded.contact_name, contact_name),
+        email = COALESCE(excluded.email, email),
+        error = excluded.error,
+        updated_at = excluded.updated_at
+"""
+
+# Stages a company moves through in pipeline_state
+STAGE_SCRAPED = "scraped"
+STAGE_ENRICHED = "enriched"
+STAGE_SENT = "sent"
+STAGE_FAILED = "failed"
+
 
 class DatabaseManager:
-    """Manages database connections and operations for the companies database."""
+    """Manages database connections and operations for the companies database.
 
-    def __init__(self, db_path: str = None):
+    A single long-lived connection in WAL mode is shared between threads and
+    guarded by a lock, so the scraper, Apollo stage and readers in other
+    processes can use the database at the same time.
+    """
+
+    def __init__(self, db_path: str = None, read_only: bool = False):
         """Initialize the database manager with a specific path or the default."""
         self.db_path = db_path or os.path.join(
             "core", "database", "companies.db"
         )
-        self._init_db()
+        self.read_only = read_only
+        self._lock = threading.RLock()
+        self._conn = self._connect()
+        if not read_only:
+            self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the shared connection and apply performance pragmas."""
+        if self.read_only:
+            conn = sqlite3.connect(
+                f"file:{self.db_path}?mode=ro",
+                uri=True,
+                check_same_thread=False,
+                timeout=30,
+            )
+        else:
+            conn = sqlite3.connect(
+                self.db_path,
+                check_same_thread=False,
+                timeout=30,
+                cached_statements=256,
+            )
+            # WAL lets readers run while a writer holds the database
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA cache_size=-16000")
+        conn.execute("PRAGMA busy_timeout=30000")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
 
     def _init_db(self) -> None:
         """Initialize database tables if they don't exist."""
@@ -26,6 +127,8 @@ class DatabaseManager:
                     description TEXT,
                     job_type TEXT,
                     size TEXT,
+                    size_min INTEGER,
+                    size_max INTEGER,
                     location TEXT,
                     date_seen DATE
                 )
@@ -41,29 +144,122 @@ class DatabaseManager:
                     description TEXT,
                     job_type TEXT,
                     size TEXT,
+                    size_min INTEGER,
+                    size_max INTEGER,
                     location TEXT,
                     contact_name TEXT,
                     email TEXT,
+                    variant TEXT,
                     date_sent DATE
                 )
             """)
+            self._add_variant_column(cursor)
+
+            # Sizes are also kept as integers so they can be queried
+            for table in ("companies_seen", "companies_sent"):
+                self._add_size_columns(cursor, table)
+                cursor.execute(f"""
+                    CREATE INDEX IF NOT EXISTS idx_{table}_size
+                    ON {table}(size_min, size_max)
+                """)
+
+            # Create pipeline_state table tracking each company's progress
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS pipeline_state(
+                    company_name TEXT PRIMARY KEY,
+                    stage TEXT NOT NULL,
+                    website TEXT,
+                    description TEXT,
+                    job_type TEXT,
+                    size TEXT,
+                    location TEXT,
+                    contact_name TEXT,
+                    email TEXT,
+                    error TEXT,
+                    updated_at TIMESTAMP
+                )
+            """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_pipeline_state_stage
+                ON pipeline_state(stage)
+            """)
+
+            # Create search_state table remembering where each search's
+            # results stood after its last run
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS search_state(
+                    job_title TEXT,
+                    location TEXT,
+                    last_run_at TIMESTAMP,
+                    top_fingerprints TEXT,
+                    PRIMARY KEY (job_title, location)
+                )
+            """)
+
+            # Create apollo_contacts table caching lookups by domain
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS apollo_contacts(
+                    domain TEXT PRIMARY KEY,
+                    contact_name TEXT,
+                    email TEXT,
+                    looked_up_at TIMESTAMP,
+                    hit INTEGER
+                )
+            """)
+
+    @staticmethod
+    def _add_size_columns(cursor: sqlite3.Cursor, table: str) -> None:
+        """Add size_min and size_max to a table from before they existed.
+
+        Existing rows are backfilled by parsing their size text once per
+        distinct size.
+        """
+        cursor.execute(f"PRAGMA table_info({table})")
+        if "size_min" in {row[1] for row in cursor.fetchall()}:
+            return
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN size_min INTEGER")
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN size_max INTEGER")
+        cursor.execute(
+            f"SELECT DISTINCT size FROM {table} WHERE size IS NOT NULL"
+        )
+        sizes = [row[0] for row in cursor.fetchall()]
+        cursor.executemany(
+            f"UPDATE {table} SET size_min = ?, size_max = ? WHERE size = ?",
+            [(*parse_company_size(size), size) for size in sizes],
+        )
+
+    @staticmethod
+    def _add_variant_column(cursor: sqlite3.Cursor) -> None:
+        """Add the template variant to a companies_sent from before it.
+
+        Emails sent before then keep a NULL variant.
+        """
+        cursor.execute("PRAGMA table_info(companies_sent)")
+        if "variant" not in {row[1] for row in cursor.fetchall()}:
+            cursor.execute("ALTER TABLE companies_sent ADD COLUMN variant TEXT")
 
     @contextmanager
     def get_connection(self) -> Tuple[sqlite3.Connection, sqlite3.Cursor]:
-        """Get a database connection and cursor as a context manager."""
-        conn = None
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            yield conn, cursor
-            conn.commit()
-        except Exception as e:
-            if conn:
-                conn.rollback()
-            raise e
-        finally:
-            if conn:
-                conn.close()
+        """Get the shared connection and a cursor as a transaction scope.
+
+        The block runs as one transaction that is committed on exit and
+        rolled back on error.
+        """
+        with self._lock:
+            cursor = self._conn.cursor()
+            try:
+                yield self._conn, cursor
+                self._conn.commit()
+            except Exception as e:
+                self._conn.rollback()
+                raise e
+            finally:
+                cursor.close()
+
+    def close(self) -> None:
+        """Close the shared connection."""
+        with self._lock:
+            self._conn.close()
 
 
 # Create a singleton instance of the database manager
@@ -75,9 +271,16 @@ def get_db_manager() -> DatabaseManager:
     global _db_manager
     if _db_manager is None:
         _db_manager = DatabaseManager()
+        atexit.register(_db_manager.close)
     return _db_manager
 
 
+def _with_size_range(company: Dict) -> Dict:
+    """Add size_min and size_max, parsed from size, to a row."""
+    size_min, size_max = parse_company_size(company.get("size"))
+    return {**company, "size_min": size_min, "size_max": size_max}
+
+
 def add_company_seen(
     company_name: str,
     description: str,
@@ -93,19 +296,17 @@ def add_company_seen(
     try:
         with db.get_connection() as (conn, cursor):
             cursor.execute(
-                """
-                INSERT OR IGNORE INTO companies_seen 
-                (company_name, description, job_type, size, location, website, date_seen)
-                VALUES (?,?,?,?,?,?,?)
-            """,
-                (
-                    company_name,
-                    description,
-                    job_type,
-                    size,
-                    location,
-                    website,
-                    date_seen,
+                INSERT_SEEN_SQL,
+                _with_size_range(
+                    {
+                        "company_name": company_name,
+                        "description": description,
+                        "job_type": job_type,
+                        "size": size,
+                        "location": location,
+                        "website": website,
+                        "date_seen": date_seen,
+                    }
                 ),
             )
             return cursor.rowcount > 0
@@ -125,32 +326,34 @@ def add_company_sent(
     website: str,
     contact_name: str,
     email: str,
+    variant: Optional[str] = None,
 ) -> bool:
-    """Add a company to the companies_sent table."""
+    """Add a company to the companies_sent table.
+
+    variant is the template variant the email was rendered from.
+    """
     db = get_db_manager()
     date_sent = datetime.datetime.now().strftime("%Y-%m-%d")
 
     try:
         with db.get_connection() as (conn, cursor):
             cursor.execute(
-                """
-                INSERT OR IGNORE INTO companies_sent 
-                (contactee_name, status, company_name, description, job_type, size, 
-                location, website, contact_name, email, date_sent)
-                VALUES (?,?,?,?,?,?,?,?,?,?,?)
-            """,
-                (
-                    contactee_name,
-                    status,
-                    company_name,
-                    description,
-                    job_type,
-                    size,
-                    location,
-                    website,
-                    contact_name,
-                    email,
-                    date_sent,
+                INSERT_SENT_SQL,
+                _with_size_range(
+                    {
+                        "contactee_name": contactee_name,
+                        "status": status,
+                        "company_name": company_name,
+                        "description": description,
+                        "job_type": job_type,
+                        "size": size,
+                        "location": location,
+                        "website": website,
+                        "contact_name": contact_name,
+                        "email": email,
+                        "variant": variant,
+                        "date_sent": date_sent,
+                    }
                 ),
             )
             return cursor.rowcount > 0
@@ -163,16 +366,465 @@ def company_seen_before(company_name: str) -> bool:
     """Check if a company has been seen or contacted before."""
     db = get_db_manager()
 
+    try:
+        with db.get_connection() as (conn, cursor):
+            cursor.execute(SELECT_SEEN_SQL, (company_name,))
+            result = cursor.fetchone()
+            return result is not None
+    except Exception as e:
+        print(f"Error checking if company seen before: {e}")
+        return False
+
+
+def company_sent_before(company_name: str) -> bool:
+    """Check if a company has already been emailed."""
+    db = get_db_manager()
+
+    try:
+        with db.get_connection() as (conn, cursor):
+            cursor.execute(SELECT_SENT_SQL, (company_name,))
+            return cursor.fetchone() is not None
+    except Exception as e:
+        print(f"Error checking if company sent before: {e}")
+        return False
+
+
+def filter_new_companies(
+    candidates: List[Dict], max_size: Optional[int] = None
+) -> Tuple[List[Dict], int]:
+    """Keep the candidates not in companies_seen and no bigger than max_size.
+
+    A page of candidates is checked in one query, by joining a temporary
+    table of them against companies_seen. A candidate fits max_size when
+    its smallest size is at most max_size and its size isn't open ended,
+    so "11-50" fits 25 but "5000+" and unparsable sizes never fit.
+
+    Args:
+        candidates: Dicts with at least company_name and size
+        max_size: Largest company size to keep, None keeps every size
+
+    Returns:
+        The kept candidates in their original order, and the number of
+        candidates not in companies_seen whatever their size
+    """
+    if not candidates:
+        return [], 0
+    db = get_db_manager()
+    rows = [
+        (
+            position,
+            candidate["company_name"],
+            *parse_company_size(candidate.get("size")),
+        )
+        for position, candidate in enumerate(candidates)
+    ]
+
+    try:
+        with db.get_connection() as (conn, cursor):
+            cursor.execute("""
+                CREATE TEMP TABLE IF NOT EXISTS candidates(
+                    position INTEGER PRIMARY KEY,
+                    company_name TEXT,
+                    size_min INTEGER,
+                    size_max INTEGER
+                )
+            """)
+            cursor.execute("DELETE FROM temp.candidates")
+            cursor.executemany(
+                "INSERT INTO temp.candidates VALUES (?, ?, ?, ?)", rows
+            )
+            cursor.execute(FILTER_CANDIDATES_SQL, {"max_size": max_size})
+            new = cursor.fetchall()
+            return [candidates[row[0]] for row in new if row[1]], len(new)
+    except Exception as e:
+        print(f"Error filtering companies: {e}")
+        return [], 0
+
+
+def get_size_counts(table: str) -> List[Tuple[str, int]]:
+    """Count the rows of companies_seen or companies_sent by size range.
+
+    Returns:
+        (size, count) pairs from smallest to largest, such as ("11-50", 3),
+        with unknown sizes last
+    """
+    if table not in ("companies_seen", "companies_sent"):
+        raise ValueError(f"Unknown companies table {table}")
+    db = get_db_manager()
+
+    try:
+        with db.get_connection() as (conn, cursor):
+            cursor.execute(f"""
+                SELECT size_min, size_max, COUNT(*) FROM {table}
+                GROUP BY size_min, size_max
+                ORDER BY size_min IS NULL, size_min, size_max IS NULL, size_max
+            """)
+            counts = []
+            for size_min, size_max, count in cursor.fetchall():
+                if size_min is None:
+                    label = "unknown"
+                elif size_max is None:
+                    label = f"{size_min}+"
+                elif size_min == size_max:
+                    label = str(size_min)
+                else:
+                    label = f"{size_min}-{size_max}"
+                counts.append((label, count))
+            return counts
+    except Exception as e:
+        print(f"Error counting companies by size: {e}")
+        return []
+
+
+def count_companies_sent_on(date_sent: str) -> int:
+    """Count the companies emailed on a date formatted as YYYY-MM-DD."""
+    db = get_db_manager()
+
+    try:
+        with db.get_connection() as (conn, cursor):
+            cursor.execute(
+                "SELECT COUNT(*) FROM companies_sent WHERE date_sent = ?",
+                (date_sent,),
+            )
+            return cursor.fetchone()[0]
+    except Exception as e:
+        print(f"Error counting sent companies: {e}")
+        return 0
+
+
+def add_companies_seen_bulk(companies: Iterable[Dict]) -> Optional[int]:
+    """Add many companies to the companies_seen table in one transaction.
+
+    Args:
+        companies: Dicts with the add_company_seen fields, date_seen defaults to today
+
+    Returns:
+        Number of rows inserted, or None if the write failed
+    """
+    db = get_db_manager()
+    date_seen = datetime.datetime.now().strftime("%Y-%m-%d")
+    rows = [
+        _with_size_range({"date_seen": date_seen, **company})
+        for company in companies
+    ]
+    if not rows:
+        return 0
+
+    try:
+        with db.get_connection() as (conn, cursor):
+            cursor.executemany(INSERT_SEEN_SQL, rows)
+            return cursor.rowcount
+    except Exception as e:
+        print(f"Error adding companies to seen list: {e}")
+        return None
+
+
+def add_companies_sent_bulk(companies: Iterable[Dict]) -> Optional[int]:
+    """Add many companies to the companies_sent table in one transaction.
+
+    Args:
+        companies: Dicts with the add_company_sent fields, date_sent defaults to today
+
+    Returns:
+        Number of rows inserted, or None if the write failed
+    """
+    db = get_db_manager()
+    date_sent = datetime.datetime.now().strftime("%Y-%m-%d")
+    rows = [
+        _with_size_range(
+            {"variant": None, "date_sent": date_sent, **company}
+        )
+        for company in companies
+    ]
+    if not rows:
+        return 0
+
+    try:
+        with db.get_connection() as (conn, cursor):
+            cursor.executemany(INSERT_SENT_SQL, rows)
+            return cursor.rowcount
+    except Exception as e:
+        print(f"Error adding companies to sent list: {e}")
+        return None
+
+
+def set_company_stage(
+    company: Dict, stage: str, error: Optional[str] = None
+) -> bool:
+    """Record the pipeline stage a company has reached.
+
+    Args:
+        company: Dict with every company field from company_name to email,
+            contact_name and email are kept once known
+        stage: One of STAGE_SCRAPED, STAGE_ENRICHED, STAGE_SENT or STAGE_FAILED
+        error: Reason the company failed, if it did
+
+    Returns:
+        True if the state was stored, False otherwise
+    """
+    db = get_db_manager()
+
+    try:
+        with db.get_connection() as (conn, cursor):
+            cursor.execute(
+                UPSERT_STAGE_SQL,
+                {
+                    **company,
+                    "stage": stage,
+                    "error": error,
+                    "updated_at": datetime.datetime.now().isoformat(
+                        timespec="seconds"
+                    ),
+                },
+            )
+            return True
+    except Exception as e:
+        print(f"Error recording pipeline stage: {e}")
+        return False
+
+
+def get_companies_in_stage(stage: str) -> List[Dict]:
+    """Get the fields of every company whose latest pipeline stage is stage."""
+    db = get_db_manager()
+
     try:
         with db.get_connection() as (conn, cursor):
             cursor.execute(
                 """
-                SELECT * FROM companies_seen WHERE company_name = ?
+                SELECT company_name, description, job_type, size, location,
+                       website, contact_name, email
+                FROM pipeline_state WHERE stage = ? ORDER BY updated_at
                 """,
-                (company_name,),
+                (stage,),
             )
-            result = cursor.fetchone()
-            return result is not None
+            columns = [column[0] for column in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
     except Exception as e:
-        print(f"Error checking if company seen before: {e}")
+        print(f"Error reading pipeline state: {e}")
+        return []
+
+
+def get_stage_counts() -> Dict[str, int]:
+    """Count the companies at each pipeline stage."""
+    db = get_db_manager()
+
+    try:
+        with db.get_connection() as (conn, cursor):
+            cursor.execute(
+                "SELECT stage, COUNT(*) FROM pipeline_state GROUP BY stage"
+            )
+            return dict(cursor.fetchall())
+    except Exception as e:
+        print(f"Error counting pipeline stages: {e}")
+        return {}
+
+
+def count_companies(table: str) -> int:
+    """Count the rows of companies_seen or companies_sent."""
+    if table not in ("companies_seen", "companies_sent"):
+        raise ValueError(f"Unknown companies table {table}")
+    db = get_db_manager()
+
+    try:
+        with db.get_connection() as (conn, cursor):
+            cursor.execute(f"SELECT COUNT(*) FROM {table}")
+            return cursor.fetchone()[0]
+    except Exception as e:
+        print(f"Error counting companies: {e}")
+        return 0
+
+
+def get_search_state(job_title: str, location: str) -> Optional[Dict]:
+    """Get the last run time and top result fingerprints of a search."""
+    db = get_db_manager()
+
+    try:
+        with db.get_connection() as (conn, cursor):
+            cursor.execute(
+                """
+                SELECT last_run_at, top_fingerprints FROM search_state
+                WHERE job_title = ? AND location = ?
+                """,
+                (job_title, location),
+            )
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            return {
+                "last_run_at": row[0],
+                "top_fingerprints": json.loads(row[1] or "[]"),
+            }
+    except Exception as e:
+        print(f"Error reading search state: {e}")
+        return None
+
+
+def save_search_state(
+    job_title: str, location: str, top_fingerprints: List[str]
+) -> bool:
+    """Record a search's top result fingerprints as of now."""
+    db = get_db_manager()
+
+    try:
+        with db.get_connection() as (conn, cursor):
+            cursor.execute(
+                """
+                INSERT INTO search_state
+                (job_title, location, last_run_at, top_fingerprints)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(job_title, location) DO UPDATE SET
+                    last_run_at = excluded.last_run_at,
+                    top_fingerprints = excluded.top_fingerprints
+                """,
+                (
+                    job_title,
+                    location,
+                    datetime.datetime.now().isoformat(timespec="seconds"),
+                    json.dumps(top_fingerprints),
+                ),
+            )
+            return True
+    except Exception as e:
+        print(f"Error saving search state: {e}")
+        return False
+
+
+def get_cached_contact(domain: str) -> Optional[Dict]:
+    """Get the cached Apollo lookup for a domain, if there is one."""
+    db = get_db_manager()
+
+    try:
+        with db.get_connection() as (conn, cursor):
+            cursor.execute(
+                """
+                SELECT contact_name, email, looked_up_at, hit
+                FROM apollo_contacts WHERE domain = ?
+                """,
+                (domain,),
+            )
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            return {
+                "contact_name": row[0],
+                "email": row[1],
+                "looked_up_at": row[2],
+                "hit": bool(row[3]),
+            }
+    except Exception as e:
+        print(f"Error reading cached contact: {e}")
+        return None
+
+
+def cache_contact(
+    domain: str,
+    contact_name: Optional[str],
+    email: Optional[str],
+    looked_up_at: str,
+) -> bool:
+    """Store the result of an Apollo lookup, a miss has no contact or email."""
+    db = get_db_manager()
+
+    try:
+        with db.get_connection() as (conn, cursor):
+            cursor.execute(
+                """
+                INSERT OR REPLACE INTO apollo_contacts 
+                (domain, contact_name, email, looked_up_at, hit)
+                VALUES (?,?,?,?,?)
+                """,
+                (
+                    domain,
+                    contact_name,
+                    email,
+                    looked_up_at,
+                    int(bool(contact_name and email)),
+                ),
+            )
+            return True
+    except Exception as e:
+        print(f"Error caching contact: {e}")
         return False
+
+
+class SeenCompanyIndex:
+    """In-memory index of seen company names backed by companies_seen.
+
+    Names are loaded once so lookups never touch the database, and new rows
+    are buffered and written in batches.
+
+    When several processes scrape at once, a shared index writes each row
+    immediately and checks the database for names it hasn't seen itself, so
+    companies found by one process are skipped by the others.
+    """
+
+    def __init__(self, flush_size: int = 50, shared: bool = False):
+        """Load all seen company names from the database."""
+        self.db = get_db_manager()
+        self.shared = shared
+        self.flush_size = 1 if shared else flush_size
+        self._pending: List[Dict] = []
+        self._names = self._load_names()
+
+    def _load_names(self) -> Set[str]:
+        """Read every company name in companies_seen."""
+        with self.db.get_connection() as (conn, cursor):
+            cursor.execute("SELECT company_name FROM companies_seen")
+            return {row[0] for row in cursor.fetchall()}
+
+    def __contains__(self, company_name: str) -> bool:
+        if company_name in self._names:
+            return True
+        if self.shared and company_seen_before(company_name):
+            self._names.add(company_name)
+            return True
+        return False
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def seen_locally(self, company_name: str) -> bool:
+        """Check the names this process loaded or added, without a query."""
+        return company_name in self._names
+
+    def add(
+        self,
+        company_name: str,
+        description: str,
+        job_type: str,
+        size: str,
+        location: str,
+        website: str,
+    ) -> bool:
+        """Mark a company as seen, buffering the row for the next flush."""
+        if company_name in self._names:
+            return False
+
+        self._names.add(company_name)
+        self._pending.append(
+            {
+                "company_name": company_name,
+                "description": description,
+                "job_type": job_type,
+                "size": size,
+                "location": location,
+                "website": website,
+            }
+        )
+        if len(self._pending) >= self.flush_size:
+            self.flush()
+        return True
+
+    def flush(self) -> int:
+        """Write buffered rows to companies_seen in a single transaction.
+
+        Rows stay buffered if the write fails, and are retried next flush.
+        """
+        if not self._pending:
+            return 0
+
+        inserted = add_companies_seen_bulk(self._pending)
+        if inserted is None:
+            return 0
+        self._pending = []
+        return inserted
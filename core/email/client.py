@@ -1,10 +1,28 @@
-import yagmail
 import os
+import copy
+import datetime
+import html
+import io
+import mimetypes
+import string
+import uuid
+import zlib
+from email import policy
+from email.generator import BytesGenerator
+from email.message import EmailMessage, MIMEPart
+from email.utils import formataddr, getaddresses
 from pathlib import Path
 import dotenv
-from typing import Optional, List, Union
+from typing import Iterable, List, Mapping, Optional, Tuple
 from dataclasses import dataclass
-from config.config import OUR_NAME
+from config.config import OUR_NAME, EMAIL_CONFIG
+from core.database.sqlite import count_companies_sent_on
+from core.email.sender import (
+    EmailSender,
+    RenderedMessage,
+    SendLimits,
+    SMTPSettings,
+)
 
 
 @dataclass
@@ -16,18 +34,105 @@ class EmailConfig:
     templates_dir: Path
     our_name: str
     cc_email: Optional[str] = None
+    smtp_host: str = "smtp.gmail.com"
+    smtp_port: int = 465
+    smtp_ssl: bool = True
+    smtp_starttls: bool = False
+    connections: int = 2
+    per_minute_limit: Optional[int] = 20
+    daily_limit: Optional[int] = 500
+    max_retries: int = 3
+    retry_backoff: float = 2.0
+
+
+# Fields a template may reference, every render supplies all of them
+TEMPLATE_FIELDS = ("recipient_name", "our_name", "company_name")
+
+# Subjects are also built on their own from just the company name
+SUBJECT_FIELDS = ("company_name",)
+
+# Name of the variant loaded from cold_outreach.txt and subject.txt
+DEFAULT_VARIANT = "default"
+
+
+class TemplateError(ValueError):
+    """Raised when a template is invalid or can't be rendered."""
+
+
+class CompiledTemplate:
+    """A template parsed and validated once, then rendered many times."""
+
+    def __init__(
+        self, name: str, text: str, allowed: Tuple[str, ...] = TEMPLATE_FIELDS
+    ):
+        """Parse a template and check its placeholders.
+
+        Args:
+            name: Name used in error messages, usually the file name
+            text: Template text with {field} placeholders
+            allowed: Fields the template may use
+
+        Raises:
+            TemplateError: If the text is malformed or uses an unknown field
+        """
+        self.name = name
+        self.text = text
+        try:
+            fields = {
+                field
+                for _, field, _, _ in string.Formatter().parse(text)
+                if field is not None
+            }
+        except ValueError as e:
+            raise TemplateError(f"Template {name} is malformed: {e}")
+
+        unknown = fields - set(allowed)
+        if unknown:
+            raise TemplateError(
+                f"Template {name} uses unknown placeholders "
+                f"{sorted(unknown)}, expected some of {list(allowed)}"
+            )
+        self.fields = fields
+        self._format = text.format_map
+
+        # Catch format specs that only fail when rendered
+        self.render({field: "" for field in allowed})
+
+    def render(self, values: Mapping[str, str]) -> str:
+        """Render the template with values for TEMPLATE_FIELDS."""
+        try:
+            return self._format(values)
+        except (KeyError, ValueError, IndexError) as e:
+            raise TemplateError(f"Failed to render template {self.name}: {e}")
+
+
+@dataclass
+class TemplateVariant:
+    """A subject and body pair that can be A/B tested against others."""
+
+    name: str
+    subject: CompiledTemplate
+    body: CompiledTemplate
 
 
 @dataclass
 class EmailTemplate:
     """Container for email template content."""
 
-    body: str
-    subject: str
+    variants: List[TemplateVariant]
     signature_path: Path
     brochure_path: Path
 
 
+@dataclass
+class EmailContent:
+    """The rendered subject and body for one recipient."""
+
+    variant: str
+    subject: str
+    body: str
+
+
 class TemplateManager:
     """Handles loading and managing email templates."""
 
@@ -54,19 +159,59 @@ class TemplateManager:
         except Exception as e:
             raise IOError(f"Failed to read template {filename}: {e}")
 
+    def compile_template(
+        self, filename: str, allowed: Tuple[str, ...] = TEMPLATE_FIELDS
+    ) -> CompiledTemplate:
+        """Read and compile a template file."""
+        return CompiledTemplate(
+            filename, self.read_template_file(filename), allowed
+        )
+
+    def load_variants(self) -> List[TemplateVariant]:
+        """Compile the default templates and every A/B variant.
+
+        A variant named b is read from cold_outreach_b.txt, with its subject
+        from subject_b.txt or the default subject.txt if that doesn't exist.
+
+        Returns:
+            Compiled variants, the default one first
+        """
+        subject = self.compile_template("subject.txt", SUBJECT_FIELDS)
+        variants = [
+            TemplateVariant(
+                name=DEFAULT_VARIANT,
+                subject=subject,
+                body=self.compile_template("cold_outreach.txt"),
+            )
+        ]
+        for path in sorted(self.templates_dir.glob("cold_outreach_*.txt")):
+            name = path.stem[len("cold_outreach_"):]
+            subject_file = f"subject_{name}.txt"
+            variants.append(
+                TemplateVariant(
+                    name=name,
+                    subject=(
+                        self.compile_template(subject_file, SUBJECT_FIELDS)
+                        if (self.templates_dir / subject_file).exists()
+                        else subject
+                    ),
+                    body=self.compile_template(path.name),
+                )
+            )
+        return variants
+
     def load_templates(self) -> EmailTemplate:
-        """Load all required email templates.
+        """Load and compile all required email templates.
 
         Returns:
             EmailTemplate object containing all loaded templates
 
         Raises:
-            IOError: If any template fails to load
+            IOError: If any template fails to load or compile
         """
         try:
             return EmailTemplate(
-                body=self.read_template_file("cold_outreach.txt"),
-                subject=self.read_template_file("subject.txt"),
+                variants=self.load_variants(),
                 signature_path=self.templates_dir / "signature.jpg",
                 brochure_path=self.templates_dir / "brochure.pdf",
             )
@@ -80,47 +225,179 @@ class EmailContentBuilder:
     def __init__(self, template: EmailTemplate):
         """Initialize content builder with templates."""
         self.template = template
+        self.variants = {
+            variant.name: variant for variant in template.variants
+        }
+
+    def choose_variant(self, company_name: str) -> TemplateVariant:
+        """Pick the variant for a company.
+
+        The choice is a stable hash of the company name, so a company always
+        gets the same variant, even across resumed runs.
+        """
+        variants = self.template.variants
+        if len(variants) == 1:
+            return variants[0]
+        index = zlib.crc32(company_name.encode("utf-8")) % len(variants)
+        return variants[index]
+
+    def _variant(
+        self, company_name: str, variant: Optional[str]
+    ) -> TemplateVariant:
+        """Get a variant by name, or choose one for the company."""
+        if variant is None:
+            return self.choose_variant(company_name)
+        try:
+            return self.variants[variant]
+        except KeyError:
+            raise TemplateError(f"Unknown template variant {variant}")
 
-    def create_subject(self, company_name: str) -> str:
+    def create_subject(
+        self, company_name: str, variant: Optional[str] = None
+    ) -> str:
         """Create email subject line.
 
         Args:
             company_name: Name of the target company
+            variant: Template variant to use, chosen by company if None
 
         Returns:
             Formatted subject line
         """
-        try:
-            return self.template.subject.format(company_name=company_name)
-        except Exception as e:
-            raise ValueError(f"Failed to create subject: {e}")
+        return self._variant(company_name, variant).subject.render(
+            {"company_name": company_name}
+        )
 
     def create_body(
-        self, recipient_name: str, our_name: str, company_name: str
-    ) -> List[Union[str, yagmail.inline]]:
-        """Create email body with signature.
+        self,
+        recipient_name: str,
+        our_name: str,
+        company_name: str,
+        variant: Optional[str] = None,
+    ) -> str:
+        """Create email body text.
 
         Args:
             recipient_name: Name of the recipient
             our_name: Sender's name
             company_name: Target company name
+            variant: Template variant to use, chosen by company if None
 
         Returns:
-            List containing body text and inline signature
+            Formatted body text, the signature is added when the message is built
 
         Raises:
-            ValueError: If body creation fails
+            TemplateError: If body creation fails
         """
-        try:
-            body = self.template.body.format(
-                recipient_name=recipient_name,
-                our_name=our_name,
-                company_name=company_name,
+        return self._variant(company_name, variant).body.render(
+            {
+                "recipient_name": recipient_name,
+                "our_name": our_name,
+                "company_name": company_name,
+            }
+        )
+
+    def render_many(
+        self, rows: Iterable[Mapping[str, str]], our_name: str
+    ) -> List[EmailContent]:
+        """Render the subject and body for a whole batch of recipients.
+
+        Every row is checked before anything is rendered, so a bad row fails
+        the batch up front instead of partway through sending it.
+
+        Args:
+            rows: Mappings with recipient_name and company_name, and
+                optionally variant to override the chosen variant. A
+                DataFrame is accepted too.
+            our_name: Sender's name
+
+        Returns:
+            Rendered content in the same order as rows
+
+        Raises:
+            TemplateError: If a row is missing a field or names an unknown variant
+        """
+        if hasattr(rows, "to_dict"):
+            rows = rows.to_dict("records")
+
+        values = []
+        variants = []
+        for index, row in enumerate(rows):
+            missing = [
+                field
+                for field in ("recipient_name", "company_name")
+                if row.get(field) is None
+            ]
+            if missing:
+                raise TemplateError(f"Row {index} is missing {missing}")
+            variants.append(
+                self._variant(row["company_name"], row.get("variant"))
             )
-            signature = yagmail.inline(str(self.template.signature_path))
-            return [body, signature]
-        except Exception as e:
-            raise ValueError(f"Failed to create body: {e}")
+            values.append(
+                {
+                    "recipient_name": row["recipient_name"],
+                    "our_name": our_name,
+                    "company_name": row["company_name"],
+                }
+            )
+
+        return [
+            EmailContent(
+                variant=variant.name,
+                subject=variant.subject.render(value),
+                body=variant.body.render(value),
+            )
+            for variant, value in zip(variants, values)
+        ]
+
+    @staticmethod
+    def create_html(body: str) -> str:
+        """Create the HTML version of a body with the inline signature.
+
+        Args:
+            body: Plain text body
+
+        Returns:
+            HTML body referencing the signature image by content ID
+        """
+        paragraphs = html.escape(body).replace("\n", "<br>\n")
+        return f'<div>{paragraphs}</div><br><img src="cid:signature">'
+
+
+def _mime_type(path: Path) -> Tuple[str, str]:
+    """Guess the (maintype, subtype) of a file from its extension."""
+    mime_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+    maintype, subtype = mime_type.split("/")
+    return maintype, subtype
+
+
+class EncodedFile:
+    """A file encoded into a MIME part once and reused in every message.
+
+    The part itself only holds a placeholder, so serializing a message stays
+    cheap, and the encoded bytes are spliced in after rendering.
+    """
+
+    def __init__(self, path: Path, **kwargs):
+        """Read and base64 encode a file.
+
+        Args:
+            path: File to encode
+            **kwargs: Extra arguments for set_content, such as cid or filename
+        """
+        maintype, subtype = _mime_type(path)
+        self.part = MIMEPart()
+        self.part.set_content(
+            path.read_bytes(), maintype=maintype, subtype=subtype, **kwargs
+        )
+        encoded = self.part.get_payload().rstrip("\n")
+        self.data = encoded.replace("\n", "\r\n").encode("ascii")
+        self.placeholder = f"{path.name}-{uuid.uuid4().hex}"
+        self.part.set_payload(self.placeholder)
+
+    def splice(self, rendered: bytes) -> bytes:
+        """Replace this file's placeholder in a rendered message."""
+        return rendered.replace(self.placeholder.encode("ascii"), self.data, 1)
 
 
 class EmailClient:
@@ -136,7 +413,15 @@ class EmailClient:
         self.template_manager = TemplateManager(config.templates_dir)
         self.templates = self.template_manager.load_templates()
         self.content_builder = EmailContentBuilder(self.templates)
-        self.session = self._create_session()
+        self.signature = EncodedFile(
+            self.templates.signature_path, cid="<signature>", disposition="inline"
+        )
+        self.brochure = EncodedFile(
+            self.templates.brochure_path,
+            filename=self.templates.brochure_path.name,
+            disposition="attachment",
+        )
+        self.sender = self._create_sender()
 
     @staticmethod
     def from_env(env_path: Optional[str] = None) -> "EmailClient":
@@ -159,27 +444,125 @@ class EmailClient:
             templates_dir=Path(__file__).parent.parent.parent / "templates",
             our_name=OUR_NAME,
             cc_email=os.getenv("CC_EMAIL"),
+            smtp_host=os.getenv("SMTP_HOST", "smtp.gmail.com"),
+            smtp_port=int(os.getenv("SMTP_PORT", "465")),
+            smtp_ssl=os.getenv("SMTP_SSL", "true").lower() == "true",
+            smtp_starttls=os.getenv("SMTP_STARTTLS", "false").lower() == "true",
+            connections=EMAIL_CONFIG.get("connections", 2),
+            per_minute_limit=EMAIL_CONFIG.get("per_minute_limit", 20),
+            daily_limit=EMAIL_CONFIG.get("daily_limit", 500),
+            max_retries=EMAIL_CONFIG.get("max_retries", 3),
+            retry_backoff=EMAIL_CONFIG.get("retry_backoff", 2.0),
         )
         return EmailClient(config)
 
-    def _create_session(self) -> Optional[yagmail.SMTP]:
-        """Create authenticated SMTP session.
+    def _create_sender(self) -> EmailSender:
+        """Create the pooled sender, connections log in on first use.
 
         Returns:
-            Authenticated SMTP session or None if authentication fails
+            EmailSender seeded with the number of emails already sent today
         """
-        try:
-            session = yagmail.SMTP(
-                user=self.config.email_user,
-                password=self.config.email_password,
+        settings = SMTPSettings(
+            user=self.config.email_user,
+            password=self.config.email_password,
+            host=self.config.smtp_host,
+            port=self.config.smtp_port,
+            use_ssl=self.config.smtp_ssl,
+            starttls=self.config.smtp_starttls,
+        )
+        return EmailSender(
+            settings,
+            connections=self.config.connections,
+            limits=SendLimits(
+                per_minute=self.config.per_minute_limit,
+                per_day=self.config.daily_limit,
+            ),
+            sent_today=count_companies_sent_on(
+                datetime.date.today().strftime("%Y-%m-%d")
+            ),
+            max_retries=self.config.max_retries,
+            retry_backoff=self.config.retry_backoff,
+        )
+
+    def _build_message(
+        self, recipient_email: str, subject: str, body: str
+    ) -> EmailMessage:
+        """Build the MIME message with placeholders for the signature and brochure.
+
+        Args:
+            recipient_email: Recipient's email address
+            subject: Subject line
+            body: Plain text body
+
+        Returns:
+            Message ready to send
+        """
+        message = EmailMessage()
+        message["From"] = formataddr(
+            (self.config.our_name, self.config.email_user)
+        )
+        message["To"] = recipient_email
+        if self.config.cc_email:
+            message["Cc"] = self.config.cc_email
+        message["Subject"] = subject
+
+        message.set_content(body)
+        message.add_alternative(
+            self.content_builder.create_html(body), subtype="html"
+        )
+
+        html_part = message.get_payload()[-1]
+        html_part.make_related()
+        html_part.attach(copy.copy(self.signature.part))
+
+        message.make_mixed()
+        message.attach(copy.copy(self.brochure.part))
+        return message
+
+    def _render(self, message: EmailMessage) -> RenderedMessage:
+        """Serialize a message and splice in the pre-encoded files.
+
+        Args:
+            message: Message from _build_message
+
+        Returns:
+            Message bytes ready for the SMTP DATA command, with its envelope
+        """
+        buffer = io.BytesIO()
+        BytesGenerator(buffer, policy=policy.SMTP).flatten(message)
+        data = self.brochure.splice(self.signature.splice(buffer.getvalue()))
+
+        # The envelope needs bare addresses, and Cc may list several
+        recipients: List[str] = [
+            address
+            for _, address in getaddresses(
+                message.get_all("To", []) + message.get_all("Cc", [])
             )
-            return session
-        except Exception as e:
-            print(f"Failed to authenticate the email sender: {e}")
-            return None
+            if address
+        ]
+        return RenderedMessage(
+            sender=self.config.email_user, recipients=recipients, data=data
+        )
+
+    def render_many(
+        self, rows: Iterable[Mapping[str, str]]
+    ) -> List[EmailContent]:
+        """Render the content for a batch of recipients up front.
+
+        Args:
+            rows: Mappings with recipient_name and company_name
+
+        Returns:
+            Rendered content in the same order as rows
+        """
+        return self.content_builder.render_many(rows, self.config.our_name)
 
     def send_email(
-        self, recipient_email: str, recipient_name: str, company_name: str
+        self,
+        recipient_email: str,
+        recipient_name: str,
+        company_name: str,
+        content: Optional[EmailContent] = None,
     ) -> bool:
         """Send outreach email to recipient.
 
@@ -187,36 +570,36 @@ class EmailClient:
             recipient_email: Recipient's email address
             recipient_name: Recipient's name
             company_name: Target company name
+            content: Content already rendered by render_many, if any
 
         Returns:
             True if email sent successfully, False otherwise
-        """
-        if not self.session:
-            print("Failed to send email: No authenticated session.")
-            return False
 
+        Raises:
+            DailyLimitReached: If the daily sending limit has been reached
+        """
         try:
-            body = self.content_builder.create_body(
-                recipient_name=recipient_name,
-                our_name=self.config.our_name,
-                company_name=company_name,
+            if content is None:
+                content = self.content_builder.render_many(
+                    [
+                        {
+                            "recipient_name": recipient_name,
+                            "company_name": company_name,
+                        }
+                    ],
+                    self.config.our_name,
+                )[0]
+            message = self._render(
+                self._build_message(
+                    recipient_email, content.subject, content.body
+                )
             )
-            subject = self.content_builder.create_subject(
-                company_name=company_name
-            )
-
-            email_args = {
-                "to": recipient_email,
-                "subject": subject,
-                "contents": body,
-                "attachments": str(self.templates.brochure_path),
-            }
-
-            if self.config.cc_email:
-                email_args["cc"] = self.config.cc_email
-
-            self.session.send(**email_args)
-            return True
         except Exception as e:
             print(f"Failed to send email: {e}")
             return False
+
+        return self.sender.send(message)
+
+    def close(self) -> None:
+        """Finish queued emails and close SMTP connections."""
+        self.sender.close()
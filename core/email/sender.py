@@ -0,0 +1,300 @@
+import datetime
+import queue
+import random
+import smtplib
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from email.message import EmailMessage
+from typing import Iterator, List, Optional, Union
+
+from utils.metrics import metrics
+from utils.rate_limit import throttles
+
+
+@dataclass
+class SMTPSettings:
+    """Connection settings for the SMTP server."""
+
+    user: str
+    password: str
+    host: str = "smtp.gmail.com"
+    port: int = 465
+    use_ssl: bool = True
+    starttls: bool = False
+    timeout: float = 30
+
+
+@dataclass
+class SendLimits:
+    """Per-account sending limits, None disables a limit."""
+
+    per_minute: Optional[int] = 20
+    per_day: Optional[int] = 500
+
+
+@dataclass
+class RenderedMessage:
+    """A message already serialized for sending, with its envelope addresses."""
+
+    sender: str
+    recipients: List[str]
+    data: bytes
+
+
+class DailyLimitReached(Exception):
+    """Raised when the account's daily sending limit has been used up."""
+
+
+# Errors worth retrying on a fresh connection
+TRANSIENT_ERRORS = (
+    smtplib.SMTPServerDisconnected,
+    smtplib.SMTPConnectError,
+    smtplib.SMTPHeloError,
+    ConnectionError,
+    TimeoutError,
+)
+
+
+# Replies of servers limiting how fast an account sends
+THROTTLE_CODES = {421, 450, 451, 452, 454}
+
+
+def is_transient(error: Exception) -> bool:
+    """Check whether a send error is temporary and worth retrying."""
+    if isinstance(error, TRANSIENT_ERRORS):
+        return True
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    return False
+
+
+class RateLimit:
+    """Thread-safe per-minute and per-day send counter.
+
+    Every attempt counts toward the per-minute limit, but only emails that
+    were delivered count toward the day's.
+    """
+
+    def __init__(self, limits: SendLimits, sent_today: int = 0):
+        """Initialize with the number of emails already sent today."""
+        self.limits = limits
+        self._lock = threading.Lock()
+        self._recent = deque()
+        self._day = datetime.date.today()
+        self._sent_today = sent_today
+
+    def acquire(self) -> None:
+        """Block until another email may be sent.
+
+        Raises:
+            DailyLimitReached: If the daily limit has been reached
+        """
+        while True:
+            with self._lock:
+                today = datetime.date.today()
+                if today != self._day:
+                    self._day, self._sent_today = today, 0
+                if (
+                    self.limits.per_day is not None
+                    and self._sent_today >= self.limits.per_day
+                ):
+                    raise DailyLimitReached(
+                        f"Daily limit of {self.limits.per_day} emails reached"
+                    )
+
+                now = time.monotonic()
+                while self._recent and now - self._recent[0] >= 60:
+                    self._recent.popleft()
+                if (
+                    self.limits.per_minute is None
+                    or len(self._recent) < self.limits.per_minute
+                ):
+                    self._recent.append(now)
+                    self._sent_today += 1
+                    return
+                wait = 60 - (now - self._recent[0])
+            time.sleep(wait)
+
+    def refund(self) -> None:
+        """Give back the day's slot of an email that wasn't delivered."""
+        with self._lock:
+            if self._sent_today:
+                self._sent_today -= 1
+
+
+class SMTPConnectionPool:
+    """Pool of authenticated SMTP connections shared between threads."""
+
+    def __init__(self, settings: SMTPSettings, size: int = 2):
+        self.settings = settings
+        self.size = max(1, size)
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.size)
+
+    def _connect(self) -> smtplib.SMTP:
+        """Open and authenticate a new connection."""
+        settings = self.settings
+        if settings.use_ssl:
+            conn = smtplib.SMTP_SSL(
+                settings.host, settings.port, timeout=settings.timeout
+            )
+        else:
+            conn = smtplib.SMTP(
+                settings.host, settings.port, timeout=settings.timeout
+            )
+            if settings.starttls:
+                conn.starttls()
+        # Local stand-in servers don't need credentials
+        if settings.password:
+            conn.login(settings.user, settings.password)
+        return conn
+
+    @staticmethod
+    def _discard(conn: smtplib.SMTP) -> None:
+        try:
+            conn.quit()
+        except Exception:
+            conn.close()
+
+    @contextmanager
+    def connection(self) -> Iterator[smtplib.SMTP]:
+        """Borrow a connection, opening one lazily on first use.
+
+        A connection that raised is dropped so the next borrower reconnects.
+        """
+        self._slots.acquire()
+        conn = None
+        try:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._connect()
+            yield conn
+            self._idle.put(conn)
+        except Exception:
+            if conn is not None:
+                self._discard(conn)
+            raise
+        finally:
+            self._slots.release()
+
+    def close(self) -> None:
+        """Close every idle connection."""
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+
+class EmailSender:
+    """Sends messages from a queue with worker threads over pooled connections.
+
+    Transient failures such as dropped connections are retried with
+    exponential backoff on a fresh connection. Below the fixed account
+    limits, sending also adapts to the server's pace through the SMTP
+    host's throttle, slowing down when it replies that it's busy.
+    """
+
+    def __init__(
+        self,
+        settings: SMTPSettings,
+        connections: int = 2,
+        limits: Optional[SendLimits] = None,
+        sent_today: int = 0,
+        max_retries: int = 3,
+        retry_backoff: float = 2.0,
+    ):
+        self.pool = SMTPConnectionPool(settings, size=connections)
+        self.rate_limit = RateLimit(limits or SendLimits(), sent_today)
+        self.throttle = throttles.get(
+            settings.host, max_per_minute=self.rate_limit.limits.per_minute
+        )
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.pool.size, thread_name_prefix="smtp-sender"
+        )
+
+    def _deliver(self, message: Union[EmailMessage, RenderedMessage]) -> bool:
+        """Send one message, retrying transient failures.
+
+        Raises:
+            DailyLimitReached: If the daily limit has been reached, so the
+                caller can keep the message for another day
+        """
+        try:
+            with metrics.timer("rate_limit_wait_seconds", limiter="smtp"):
+                self.rate_limit.acquire()
+        except DailyLimitReached:
+            metrics.increment("email_failures", reason="daily_limit")
+            raise
+
+        sent = self._send_with_retries(message)
+        if not sent:
+            self.rate_limit.refund()
+        return sent
+
+    def _send_with_retries(
+        self, message: Union[EmailMessage, RenderedMessage]
+    ) -> bool:
+        for attempt in range(self.max_retries + 1):
+            self.throttle.acquire_blocking()
+            with metrics.timer("smtp_send_seconds") as labels:
+                labels["result"] = "error"
+                try:
+                    with self.pool.connection() as conn:
+                        if isinstance(message, RenderedMessage):
+                            conn.sendmail(
+                                message.sender, message.recipients, message.data
+                            )
+                        else:
+                            conn.send_message(message)
+                    labels["result"] = "sent"
+                    self.throttle.success()
+                    return True
+                except Exception as e:
+                    error = e
+            code = getattr(error, "smtp_code", None)
+            if code in THROTTLE_CODES:
+                self.throttle.throttled(f"smtp_{code}")
+            elif is_transient(error):
+                self.throttle.failure("transient")
+            if not is_transient(error) or attempt == self.max_retries:
+                print(f"Failed to send email: {error}")
+                reason = "transient" if is_transient(error) else "permanent"
+                metrics.increment("email_failures", reason=reason)
+                return False
+            metrics.increment("smtp_retries")
+            delay = self.retry_backoff * 2**attempt * random.uniform(0.5, 1.5)
+            print(
+                f"Transient error sending email, retrying in {delay:.1f}s: {error}"
+            )
+            time.sleep(delay)
+        return False
+
+    def submit(self, message: Union[EmailMessage, RenderedMessage]) -> Future:
+        """Queue a message for sending.
+
+        Returns:
+            Future resolving to True if the message was sent, False otherwise,
+            or raising DailyLimitReached once the daily limit is used up
+        """
+        return self._executor.submit(self._deliver, message)
+
+    def send(self, message: Union[EmailMessage, RenderedMessage]) -> bool:
+        """Send a message and wait for the result.
+
+        Raises:
+            DailyLimitReached: If the daily limit has been reached
+        """
+        return self.submit(message).result()
+
+    def close(self) -> None:
+        """Finish queued messages and close all connections."""
+        self._executor.shutdown(wait=True)
+        self.pool.close()
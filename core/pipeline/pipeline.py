@@ -0,0 +1,239 @@
+import sys
+import os
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import (
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Iterable,
+    List,
+    Optional,
+)
+
+sys.path.append(
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+)
+
+from core.database.sqlite import (
+    STAGE_ENRICHED,
+    STAGE_FAILED,
+    STAGE_SCRAPED,
+    STAGE_SENT,
+)
+from core.pipeline.records import CompanyRecord
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Queue marker telling a worker there is no more work
+_DONE = object()
+
+
+class StageStopped(Exception):
+    """Raised by a stage to stop it for the rest of the run.
+
+    The company being handled and every one queued after it stay at the
+    stage they reached, for a later run to pick up, such as when the daily
+    email limit is used up.
+    """
+
+
+@dataclass
+class PipelineConfig:
+    """Configuration for the streaming scrape, enrich and send pipeline."""
+
+    queue_size: int = 20
+    enrich_workers: int = 1
+    send_workers: int = 2
+
+
+@dataclass
+class PipelineStats:
+    """Counts of companies that reached each stage."""
+
+    scraped: int = 0
+    enriched: int = 0
+    sent: int = 0
+    failed: int = 0
+
+
+class Pipeline:
+    """Streams companies from the scraper through enrichment to sending.
+
+    Each stage runs its own workers connected by bounded queues, so a company
+    is emailed as soon as it has been enriched and a slow stage applies
+    backpressure to the ones before it. record_stage is called whenever a
+    company reaches a new stage so an interrupted run can be resumed.
+
+    Leaving out enrich or send stops companies at the stage before it, so
+    scraping, enrichment and sending can also run on their own.
+    """
+
+    def __init__(
+        self,
+        config: PipelineConfig,
+        enrich: Optional[
+            Callable[[CompanyRecord], Awaitable[Optional[CompanyRecord]]]
+        ] = None,
+        send: Optional[Callable[[CompanyRecord], Awaitable[bool]]] = None,
+        record_stage: Optional[
+            Callable[[CompanyRecord, str, Optional[str]], bool]
+        ] = None,
+    ):
+        self.config = config
+        self.enrich = enrich
+        self.send = send
+        self.record_stage = record_stage
+        self.stats = PipelineStats()
+        self._started_at = None
+        self._send_stopped = False
+
+    def _record(
+        self, company: CompanyRecord, stage: str, error: Optional[str] = None
+    ) -> None:
+        """Record a company's stage if state tracking is enabled."""
+        if self.record_stage:
+            self.record_stage(company, stage, error)
+
+    async def _enrich_worker(
+        self, enrich_queue: asyncio.Queue, send_queue: asyncio.Queue
+    ) -> None:
+        """Enrich companies and hand the ones with contacts to the senders."""
+        while True:
+            company = await enrich_queue.get()
+            if company is _DONE:
+                return
+
+            try:
+                enriched = await self.enrich(company)
+                error = None if enriched else "No contact found"
+                reason = "no_contact"
+            except Exception as e:
+                logger.error(
+                    f"Error enriching company {company.company_name}",
+                    exc_info=True,
+                )
+                enriched, error = None, str(e)
+                reason = type(e).__name__
+
+            if enriched:
+                self.stats.enriched += 1
+                self._record(enriched, STAGE_ENRICHED)
+                if self.send:
+                    await send_queue.put(enriched)
+            else:
+                self.stats.failed += 1
+                metrics.increment(
+                    "pipeline_failures", stage="enrich", reason=reason
+                )
+                self._record(company, STAGE_FAILED, error)
+
+    async def _send_worker(self, send_queue: asyncio.Queue) -> None:
+        """Send emails for enriched companies."""
+        while True:
+            company = await send_queue.get()
+            if company is _DONE:
+                return
+            if self._send_stopped:
+                # Still taken off the queue so the stages before don't block
+                continue
+
+            try:
+                sent = await self.send(company)
+                error = None if sent else "Email failed to send"
+                reason = "not_sent"
+            except StageStopped as e:
+                if not self._send_stopped:
+                    self._send_stopped = True
+                    logger.warning(
+                        f"Stopped sending, the remaining companies stay "
+                        f"enriched for a later run: {str(e)}"
+                    )
+                continue
+            except Exception as e:
+                logger.error(
+                    f"Error sending to company {company.company_name}",
+                    exc_info=True,
+                )
+                sent, error = False, str(e)
+                reason = type(e).__name__
+
+            if not sent:
+                self.stats.failed += 1
+                metrics.increment(
+                    "pipeline_failures", stage="send", reason=reason
+                )
+                self._record(company, STAGE_FAILED, error)
+                continue
+
+            self.stats.sent += 1
+            self._record(company, STAGE_SENT)
+            if self.stats.sent == 1:
+                logger.info(
+                    f"First email sent {time.monotonic() - self._started_at:.1f}s "
+                    "after the pipeline started"
+                )
+
+    @staticmethod
+    async def _drain(queue: asyncio.Queue, workers: List[asyncio.Task]) -> None:
+        """Tell every worker of a stage to stop and wait for them to finish."""
+        for _ in workers:
+            await queue.put(_DONE)
+        await asyncio.gather(*workers)
+
+    async def run(
+        self,
+        source: Optional[AsyncIterator[List[CompanyRecord]]] = None,
+        pending_enrich: Iterable[CompanyRecord] = (),
+        pending_send: Iterable[CompanyRecord] = (),
+    ) -> PipelineStats:
+        """Run the pipeline over batches of scraped companies.
+
+        pending_enrich and pending_send hold companies left over from an
+        earlier run, which re-enter the pipeline at the stage they reached.
+        """
+        self._started_at = time.monotonic()
+        enrich_queue = asyncio.Queue(maxsize=self.config.queue_size)
+        send_queue = asyncio.Queue(maxsize=self.config.queue_size)
+        enrich_workers = max(1, self.config.enrich_workers) if self.enrich else 0
+        send_workers = max(1, self.config.send_workers) if self.send else 0
+        enrichers = [
+            asyncio.create_task(self._enrich_worker(enrich_queue, send_queue))
+            for _ in range(enrich_workers)
+        ]
+        senders = [
+            asyncio.create_task(self._send_worker(send_queue))
+            for _ in range(send_workers)
+        ]
+
+        try:
+            if self.send:
+                for company in pending_send:
+                    await send_queue.put(company)
+            if self.enrich:
+                for company in pending_enrich:
+                    await enrich_queue.put(company)
+
+            if source is not None:
+                async for companies in source:
+                    for company in companies:
+                        self.stats.scraped += 1
+                        self._record(company, STAGE_SCRAPED)
+                        if self.enrich:
+                            await enrich_queue.put(company)
+
+            await self._drain(enrich_queue, enrichers)
+            await self._drain(send_queue, senders)
+        finally:
+            for task in enrichers + senders:
+                task.cancel()
+
+        logger.info(
+            f"Pipeline completed. Scraped: {self.stats.scraped}, "
+            f"enriched: {self.stats.enriched}, sent: {self.stats.sent}, "
+            f"failed: {self.stats.failed}"
+        )
+        return self.stats
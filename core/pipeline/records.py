@@ -0,0 +1,124 @@
+from pathlib import Path
+from typing import Any, Dict, Iterable, Mapping, Optional, Union
+
+
+class CompanyRecord:
+    """One company as it moves from scraping through enrichment to sending.
+
+    Records use __slots__ so thousands of them stay small in memory, and are
+    passed between stages directly instead of through a DataFrame.
+    """
+
+    FIELDS = (
+        "company_name",
+        "description",
+        "job_type",
+        "size",
+        "location",
+        "website",
+        "contact_name",
+        "email",
+    )
+
+    __slots__ = FIELDS
+
+    def __init__(
+        self,
+        company_name: str,
+        description: Optional[str] = None,
+        job_type: Optional[str] = None,
+        size: Optional[str] = None,
+        location: Optional[str] = None,
+        website: Optional[str] = None,
+        contact_name: Optional[str] = None,
+        email: Optional[str] = None,
+    ):
+        self.company_name = company_name
+        self.description = description
+        self.job_type = job_type
+        self.size = size
+        self.location = location
+        self.website = website
+        self.contact_name = contact_name
+        self.email = email
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "CompanyRecord":
+        """Build a record from a mapping, ignoring keys that aren't fields."""
+        return cls(
+            **{field: data[field] for field in cls.FIELDS if field in data}
+        )
+
+    def to_dict(self) -> Dict[str, Optional[str]]:
+        """Get the record's fields as a dict, such as for a database row."""
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    def with_contact(self, contact_name: str, email: str) -> "CompanyRecord":
+        """Get a copy of the record with its contact filled in."""
+        record = CompanyRecord(**self.to_dict())
+        record.contact_name = contact_name
+        record.email = email
+        return record
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, CompanyRecord):
+            return NotImplemented
+        return all(
+            getattr(self, field) == getattr(other, field)
+            for field in self.FIELDS
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"CompanyRecord(company_name={self.company_name!r}, "
+            f"website={self.website!r}, email={self.email!r})"
+        )
+
+
+def export_records(
+    records: Iterable[CompanyRecord], path: Union[str, Path]
+) -> int:
+    """Write records to a columnar file for analytics.
+
+    Files ending in .parquet are written as Parquet, anything else as an
+    Arrow IPC file. Requires the optional pyarrow package.
+
+    Args:
+        records: Records to export
+        path: Output file path
+
+    Returns:
+        Number of records written
+
+    Raises:
+        ImportError: If pyarrow isn't installed
+    """
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise ImportError(
+            "Exporting records requires pyarrow, install it with "
+            "`pip install pyarrow`"
+        )
+
+    columns = {field: [] for field in CompanyRecord.FIELDS}
+    for record in records:
+        for field, column in columns.items():
+            column.append(getattr(record, field))
+    table = pa.table(
+        {
+            field: pa.array(column, pa.string())
+            for field, column in columns.items()
+        }
+    )
+
+    path = Path(path)
+    if path.suffix == ".parquet":
+        import pyarrow.parquet as pq
+
+        pq.write_table(table, path)
+    else:
+        with pa.OSFile(str(path), "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+    return table.num_rows
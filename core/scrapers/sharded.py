@@ -0,0 +1,210 @@
+import sys
+import os
+import asyncio
+import logging
+import multiprocessing as mp
+import queue
+import traceback
+from typing import AsyncIterator, Callable, List, Optional, Set, Tuple
+
+sys.path.append(
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+)
+
+from core.pipeline.records import CompanyRecord
+from core.scrapers.wellfound import WellfoundConfig, WellfoundScraper
+from utils.log_config import configure_logging
+from utils.rate_limit import ThrottleSettings, get_throttle_settings, throttles
+
+logger = logging.getLogger(__name__)
+
+Query = Tuple[str, str, str]
+
+# Messages workers put on the results queue, as (kind, worker, payload)
+_PAGE = "page"
+_DONE = "done"
+_ERROR = "error"
+
+# Seconds the coordinator waits for a message before checking on workers
+_POLL_INTERVAL = 1.0
+
+
+def split_queries(queries: List[Query], workers: int) -> List[List[Query]]:
+    """Deal queries round-robin into at most workers non-empty shards."""
+    shards = [queries[index::workers] for index in range(workers)]
+    return [shard for shard in shards if shard]
+
+
+async def _scrape_shard(
+    config: WellfoundConfig,
+    index: int,
+    queries: List[Query],
+    results: mp.Queue,
+    stop: mp.Event,
+) -> None:
+    """Scrape a worker's queries, putting each page on the results queue."""
+    scraper = WellfoundScraper(
+        config,
+        queries=queries,
+        profile_name=f"wellfound-{index}",
+        shared_seen=True,
+    )
+    await scraper.initialize()
+    pages = scraper.scrape_iter()
+    try:
+        async for companies in pages:
+            results.put((_PAGE, index, companies))
+            if stop.is_set():
+                break
+    finally:
+        await pages.aclose()
+
+
+def _run_worker(
+    config: WellfoundConfig,
+    index: int,
+    queries: List[Query],
+    results: mp.Queue,
+    stop: mp.Event,
+    throttle_settings: ThrottleSettings,
+) -> None:
+    """Entry point of a worker process, runs its own browser and event loop."""
+    configure_logging()
+    throttles.configure(throttle_settings)
+    import nodriver as uc
+
+    try:
+        uc.loop().run_until_complete(
+            _scrape_shard(config, index, queries, results, stop)
+        )
+    except BaseException:
+        results.put((_ERROR, index, traceback.format_exc()))
+    else:
+        results.put((_DONE, index, None))
+
+
+class ShardedScraper:
+    """Splits the Wellfound searches across worker processes.
+
+    Each worker runs its own browser with its own profile directory, so page
+    rendering is spread over several cores. Workers skip companies already
+    in companies_seen, including ones other workers just added, and send
+    each scraped page back over a queue. Companies two workers found at the
+    same time are dropped here.
+
+    Each worker throttles its own requests, so every worker gets an equal
+    share of the configured rates and together they keep to them.
+    """
+
+    def __init__(
+        self,
+        config: WellfoundConfig,
+        workers: Optional[int] = None,
+        run_worker: Callable[..., None] = _run_worker,
+    ):
+        self.config = config
+        self.workers = workers or config.workers
+        # Entry point of each worker process, tests swap in stub workers
+        self.run_worker = run_worker
+
+    async def _next_message(
+        self,
+        results: mp.Queue,
+        processes: List[mp.Process],
+        finished: Set[int],
+    ) -> Optional[Tuple[str, int, object]]:
+        """Get the next worker message, or an error for a worker that died."""
+        try:
+            return await asyncio.to_thread(results.get, True, _POLL_INTERVAL)
+        except queue.Empty:
+            pass
+
+        for index, process in enumerate(processes):
+            if index not in finished and not process.is_alive():
+                # Give a message sent just before exiting a chance to arrive
+                try:
+                    return await asyncio.to_thread(
+                        results.get, True, _POLL_INTERVAL
+                    )
+                except queue.Empty:
+                    return (
+                        _ERROR,
+                        index,
+                        f"exited with code {process.exitcode}",
+                    )
+        return None
+
+    async def scrape_iter(self) -> AsyncIterator[List[CompanyRecord]]:
+        """Yield each page of companies as any worker finishes it."""
+        shards = split_queries(
+            WellfoundScraper(self.config)._build_queries(), self.workers
+        )
+        logger.info(
+            f"Splitting {sum(len(shard) for shard in shards)} searches "
+            f"across {len(shards)} browser processes"
+        )
+
+        throttle_settings = (
+            throttles.settings or get_throttle_settings()
+        ).split(len(shards))
+
+        context = mp.get_context("spawn")
+        results = context.Queue()
+        stop = context.Event()
+        processes = [
+            context.Process(
+                target=self.run_worker,
+                args=(
+                    self.config,
+                    index,
+                    shard,
+                    results,
+                    stop,
+                    throttle_settings,
+                ),
+                name=f"wellfound-worker-{index}",
+                daemon=True,
+            )
+            for index, shard in enumerate(shards)
+        ]
+        for process in processes:
+            process.start()
+
+        finished: Set[int] = set()
+        seen: Set[str] = set()
+        total_companies = 0
+        try:
+            while len(finished) < len(processes):
+                message = await self._next_message(
+                    results, processes, finished
+                )
+                if message is None:
+                    continue
+
+                kind, index, payload = message
+                if kind == _PAGE:
+                    companies = [
+                        company
+                        for company in payload
+                        if company.company_name not in seen
+                    ]
+                    seen.update(company.company_name for company in companies)
+                    total_companies += len(companies)
+                    yield companies
+                elif kind == _ERROR:
+                    finished.add(index)
+                    logger.error(f"Scraper worker {index} failed: {payload}")
+                else:
+                    finished.add(index)
+                    logger.info(f"Scraper worker {index} finished")
+        finally:
+            stop.set()
+            for process in processes:
+                process.join(timeout=10)
+                if process.is_alive():
+                    process.terminate()
+
+        logger.info(
+            f"Sharded scraping completed. Total companies processed: "
+            f"{total_companies}"
+        )
@@ -1,32 +1,54 @@
 import sys
 import os
-from typing import List, Dict, Optional
-import pandas as pd
+import re
+import asyncio
+import hashlib
+from typing import Any, AsyncIterator, List, Dict, Optional, Tuple
+from urllib.parse import urlparse
 import nodriver as uc
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import logging
 
 sys.path.append(
     os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
 )
 
-from core.database.sqlite import add_company_seen, company_seen_before
+from core.browser.network import ResponseCapture, iter_dicts
+from core.browser.manager import BrowserManager
+from core.browser.pool import new_host_slots
+from core.browser import tracing
+from core.browser.profile import BrowserProfile, get_browser_profile
+from core.browser.waits import Condition, wait_for_any
+from core.database.sqlite import (
+    SeenCompanyIndex,
+    filter_new_companies,
+    get_search_state,
+    save_search_state,
+)
+from core.pipeline.records import CompanyRecord
+from utils.metrics import metrics
 from utils.parse_link import parse_link
+from utils.rate_limit import Throttled, throttles
 from config.config import WELLFOUND_CONFIG
 
 
-# Configure logging
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.INFO)
 
-# Create console handler with formatting
-console_handler = logging.StreamHandler()
-console_handler.setLevel(logging.INFO)
-formatter = logging.Formatter(
-    "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
-console_handler.setFormatter(formatter)
-logger.addHandler(console_handler)
+# Each company in the search results is one of these elements
+_RESULT_SELECTOR = ".pl-2.flex.flex-col"
+
+# DataDome shows its CAPTCHA in this frame when it blocks the scraper
+_CAPTCHA = Condition(selector='iframe[src*="captcha-delivery.com"]')
+
+# Times a throttled search page is loaded again before its search stops
+_THROTTLE_RETRIES = 2
+
+# Marks the end of a search query's batches
+_QUERY_DONE = object()
+
+
+class ProfileUnavailable(Exception):
+    """A company profile that didn't load this time, e.g. on a CAPTCHA."""
 
 
 @dataclass
@@ -37,30 +59,105 @@ class WellfoundConfig:
     locations: List[str]
     max_company_size: int
     base_url: str = "https://wellfound.com"
+    profile_tabs: int = 1
+    max_requests_per_host: Optional[int] = None
+    search_tabs: int = 1
+    max_in_flight: int = 4
+    page_timeout: float = 30
+    extraction_mode: str = "dom"
+    workers: int = 1
+    pagination: str = "pages"
+    max_pages: int = 1
+    max_results: Optional[int] = None
+    scroll_timeout: float = 5
+    incremental: bool = True
+    search_state_size: int = 10
+    browser: BrowserProfile = field(default_factory=BrowserProfile)
+
+
+def _format_company_size(size: str) -> str:
+    """Convert a size enum like SIZE_11_50 or SIZE_5000_PLUS to 11-50 or 5000+."""
+    parts = size.replace("SIZE_", "").split("_")
+    if parts[-1] == "PLUS":
+        return f"{parts[0]}+"
+    return "-".join(parts)
+
+
+def parse_startups(payload: Any, base_url: str) -> Optional[List[Dict]]:
+    """Extract company listings from a captured Wellfound JSON payload."""
+    companies = []
+    slugs = set()
+    for item in iter_dicts(payload):
+        slug = item.get("slug")
+        if not (
+            isinstance(item.get("name"), str)
+            and isinstance(slug, str)
+            and isinstance(item.get("companySize"), str)
+        ):
+            continue
+        if slug in slugs:
+            continue
+        slugs.add(slug)
+
+        company = {
+            "company_name": item["name"],
+            "description": (item.get("highConcept") or "").strip('"'),
+            "size": _format_company_size(item["companySize"]),
+            "page_url": f"{base_url}/company/{slug}",
+        }
+        if item.get("companyUrl"):
+            company["website"] = parse_link(
+                re.sub(r"^https?://", "", item["companyUrl"])
+            )
+        companies.append(company)
+
+    return companies or None
+
+
+def listing_fingerprint(listing: Dict) -> str:
+    """Identify a search result by its profile URL, or its name without one."""
+    key = listing.get("page_url") or listing["company_name"]
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
 
 
 class CompanyScraper:
     """Handles scraping of company information from Wellfound."""
 
-    def __init__(self, browser: uc.Browser, config: WellfoundConfig):
-        self.browser = browser
+    def __init__(
+        self,
+        manager: BrowserManager,
+        config: WellfoundConfig,
+        request_slots: Optional[asyncio.Semaphore] = None,
+        host_slots: Optional[Dict[str, asyncio.Semaphore]] = None,
+        shared_seen: bool = False,
+    ):
         self.config = config
+        self.tab_pool = manager.tab_pool(
+            size=config.profile_tabs,
+            per_host_limit=config.max_requests_per_host,
+            request_slots=request_slots,
+            host_slots=host_slots,
+        )
+        self.seen_index = SeenCompanyIndex(shared=shared_seen)
+        self._in_flight = set()
 
     async def _get_company_details(self, company_element) -> Optional[Dict]:
         """Extract basic company information from a company element."""
         try:
-            company_page = await company_element.query_selector(
-                "a.text-neutral-1000"
-            )
-            company_name = await company_page.query_selector(
-                "h2.inline.text-md.font-semibold"
-            )
-            company_desc = await company_element.query_selector(
-                "span.text-xs.text-neutral-1000"
-            )
-            company_size = await company_element.query_selector(
-                "span.text-xs.italic.text-neutral-500"
-            )
+            # One slice in traces, to see the round trips these lookups take
+            with tracing.span(company_element.tab, "company details"):
+                company_page = await company_element.query_selector(
+                    "a.text-neutral-1000"
+                )
+                company_name = await company_page.query_selector(
+                    "h2.inline.text-md.font-semibold"
+                )
+                company_desc = await company_element.query_selector(
+                    "span.text-xs.text-neutral-1000"
+                )
+                company_size = await company_element.query_selector(
+                    "span.text-xs.italic.text-neutral-500"
+                )
 
             if not all([company_name, company_desc, company_size]):
                 logger.warning("Missing required company details from element")
@@ -83,20 +180,43 @@ class CompanyScraper:
             return None
 
     async def _get_company_website(self, company_url: str) -> Optional[str]:
-        """Get company website from their profile page."""
-        logger.debug(f"Fetching website from company profile: {company_url}")
-        company_page = await self.browser.get(company_url, new_tab=True)
+        """Get company website from their profile page.
 
-        try:
-            if await company_page.find(text="Page not found", timeout=1):
+        Raises:
+            ProfileUnavailable: If the page timed out or showed a CAPTCHA
+        """
+        logger.debug(f"Fetching website from company profile: {company_url}")
+        async with self.tab_pool.open(company_url) as company_page:
+            outcome = await wait_for_any(
+                company_page,
+                {
+                    "website": Condition(
+                        selector="button.styles_websiteLink___Rnfc"
+                    ),
+                    "not_found": Condition(texts=("Page not found",)),
+                    "captcha": _CAPTCHA,
+                },
+                timeout=self.config.page_timeout,
+            )
+            throttle = throttles.for_url(company_url)
+            if outcome == "captcha":
+                logger.warning(f"CAPTCHA shown for company page: {company_url}")
+                metrics.increment("wellfound_failures", reason="captcha")
+                throttle.throttled("captcha")
+                raise ProfileUnavailable("captcha")
+            if outcome is None:
+                logger.warning(
+                    f"Timed out waiting for company page: {company_url}"
+                )
+                metrics.increment("wellfound_failures", reason="timeout")
+                throttle.failure("timeout")
+                raise ProfileUnavailable("timeout")
+            throttle.success()
+            if outcome == "not_found":
                 logger.warning(f"Company page not found: {company_url}")
+                metrics.increment("wellfound_failures", reason="not_found")
                 return None
 
-            await company_page.wait_for(
-                selector="button.styles_websiteLink___Rnfc",
-                timeout=float("inf"),
-            )
-
             website_elem = await company_page.query_selector(
                 "button.styles_websiteLink___Rnfc"
             )
@@ -108,25 +228,40 @@ class CompanyScraper:
                 logger.warning(
                     f"No website found for company at: {company_url}"
                 )
+                metrics.increment("wellfound_failures", reason="no_website")
 
             return website
-        finally:
-            await company_page.close()
 
-    def _should_process_company(self, company_data: Dict, size: str) -> bool:
-        """Determine if company should be processed based on criteria."""
-        company_name = company_data["company_name"]
+    def filter_listings(self, listings: List[Dict]) -> Tuple[List[Dict], int]:
+        """Keep a page's listings of new companies within the size limit.
 
-        if (
-            "+" in size
-            or int(size.split("-")[0]) > self.config.max_company_size
-        ):
-            logger.debug(
-                f"Company {company_name} excluded due to size: {size}"
-            )
-            return False
+        The whole page is checked in one database query, after writing
+        the companies seen so far so the query sees them too.
 
-        if company_seen_before(company_name):
+        Returns:
+            The listings to process, and the number of listings not seen
+            before whatever their size
+        """
+        self.seen_index.flush()
+        kept, unseen = filter_new_companies(
+            listings, self.config.max_company_size
+        )
+        logger.debug(
+            f"Kept {len(kept)} of {len(listings)} companies, "
+            f"{unseen} not seen before"
+        )
+        return [
+            listing
+            for listing in kept
+            if listing["company_name"] not in self._in_flight
+        ], unseen
+
+    def _should_process_company(self, company_data: Dict) -> bool:
+        """Check another search hasn't started on a filtered company since."""
+        company_name = company_data["company_name"]
+        if company_name in self._in_flight or self.seen_index.seen_locally(
+            company_name
+        ):
             logger.debug(
                 f"Company {company_name} already processed previously"
             )
@@ -134,82 +269,403 @@ class CompanyScraper:
 
         return True
 
-    async def _process_company(
-        self, company_element, job_type: str, location: str
-    ) -> Optional[Dict]:
-        """Process a single company element and return its data."""
-        company_data = await self._get_company_details(company_element)
-        if not company_data:
-            return None
-
-        if not self._should_process_company(
-            company_data, company_data["size"]
-        ):
+    async def _process_company_data(
+        self, company_data: Dict, job_type: str, location: str
+    ) -> Optional[CompanyRecord]:
+        """Process a listing kept by filter_listings and return its record."""
+        if not self._should_process_company(company_data):
             return None
 
-        website = await self._get_company_website(company_data["page_url"])
+        # Listings captured from the network may already include the website
+        website = company_data.get("website")
+        if not website:
+            self._in_flight.add(company_data["company_name"])
+            try:
+                website = await self._get_company_website(
+                    company_data["page_url"]
+                )
+            finally:
+                self._in_flight.discard(company_data["company_name"])
         if not website:
             return None
 
-        company_data.update(
-            {"job_type": job_type, "location": location, "website": website}
+        company = CompanyRecord(
+            company_name=company_data["company_name"],
+            description=company_data["description"],
+            job_type=job_type,
+            size=company_data["size"],
+            location=location,
+            website=website,
         )
 
         logger.info(
-            f"Processing company: {company_data['company_name']} "
-            f"({company_data['location']}, {company_data['job_type']})"
+            f"Processing company: {company.company_name} "
+            f"({company.location}, {company.job_type})"
         )
 
-        add_company_seen(
-            company_name=company_data["company_name"],
-            description=company_data["description"],
-            job_type=company_data["job_type"],
-            size=company_data["size"],
-            location=company_data["location"],
-            website=company_data["website"],
+        self.seen_index.add(
+            company_name=company.company_name,
+            description=company.description,
+            job_type=company.job_type,
+            size=company.size,
+            location=company.location,
+            website=company.website,
         )
 
-        return company_data
+        return company
 
 
 class WellfoundScraper:
-    """Main scraper class for Wellfound job listings."""
-
-    def __init__(self, config: WellfoundConfig):
+    """Main scraper class for Wellfound job listings.
+
+    By default every configured search is scraped. A sharded worker passes
+    its own subset of queries, its own browser profile name and shared_seen
+    so it skips companies other workers have already found. Given a
+    manager, the scraper borrows its shared browser instead of starting
+    one.
+    """
+
+    def __init__(
+        self,
+        config: WellfoundConfig,
+        queries: Optional[List[Tuple[str, str, str]]] = None,
+        profile_name: str = "wellfound",
+        shared_seen: bool = False,
+        manager: Optional[BrowserManager] = None,
+    ):
         self.config = config
+        self.queries = queries
+        self.shared_seen = shared_seen
+        self.owns_manager = manager is None
+        self.manager = manager or BrowserManager(
+            config.browser, name=profile_name
+        )
         self.browser = None
         self.company_scraper = None
+        self.search_pool = None
 
     async def initialize(self):
         """Initialize browser and company scraper."""
-        self.browser = await uc.start(no_sandbox=True)
-        self.company_scraper = CompanyScraper(self.browser, self.config)
+        self.browser = await self.manager.start()
+        # One semaphore caps page loads across both search and profile tabs,
+        # and one per host caps the loads each site gets from both
+        request_slots = asyncio.Semaphore(self.config.max_in_flight)
+        host_slots = (
+            new_host_slots(self.config.max_requests_per_host)
+            if self.config.max_requests_per_host
+            else None
+        )
+        self.search_pool = self.manager.tab_pool(
+            size=self.config.search_tabs,
+            per_host_limit=self.config.max_requests_per_host,
+            request_slots=request_slots,
+            host_slots=host_slots,
+        )
+        self.company_scraper = CompanyScraper(
+            self.manager,
+            self.config,
+            request_slots=request_slots,
+            host_slots=host_slots,
+            shared_seen=self.shared_seen,
+        )
 
-    async def _get_companies_from_page(
-        self, url: str, job_type: str, location: str
-    ) -> List[Dict]:
-        """Get all companies from a single search page."""
-        logger.info(f"Scraping companies from: {url}")
-        page = await self.browser.get(url)
-        await page.wait_for(
-            selector=".pl-2.flex.flex-col", timeout=float("inf")
+    def _page_url(self, url: str, page_number: int) -> str:
+        """Get the URL of a numbered page of search results."""
+        if page_number == 1:
+            return url
+        separator = "&" if "?" in url else "?"
+        return f"{url}{separator}page={page_number}"
+
+    def _new_capture(self) -> Optional[ResponseCapture]:
+        """Create a response capture if companies are read from the network."""
+        if self.config.extraction_mode != "network":
+            return None
+        return ResponseCapture(
+            re.escape(urlparse(self.config.base_url).netloc)
         )
 
-        companies = []
-        company_elements = await page.query_selector_all(".pl-2.flex.flex-col")
-        logger.info(f"Found {len(company_elements)} companies on page")
+    async def _read_listings(
+        self,
+        page: uc.Tab,
+        capture: Optional[ResponseCapture],
+        offset: int = 0,
+        timeout: Optional[float] = None,
+    ) -> Tuple[List[Dict], int]:
+        """Read the company listings a search page has loaded.
+
+        Args:
+            page: Tab showing the search results
+            capture: Capture attached to the tab, to read captured JSON first
+            offset: Number of result elements already read from this tab
+            timeout: Seconds to wait for results, the page timeout if None
+
+        Returns:
+            Listings with company_name, description, size and page_url, and
+            website when the captured JSON includes it, and the number of
+            results read, counting those whose details couldn't be parsed
+
+        Raises:
+            Throttled: If the site answered with a CAPTCHA or throttling status
+        """
+        timeout = self.config.page_timeout if timeout is None else timeout
+        if capture:
+            listings = await capture.wait_for(
+                lambda payload: parse_startups(payload, self.config.base_url),
+                timeout=timeout,
+            )
+            if listings:
+                logger.info(
+                    f"Found {len(listings)} companies in network payloads"
+                )
+                return listings, len(listings)
+            if capture.throttled_status:
+                raise Throttled(f"status_{capture.throttled_status}")
+            if offset:
+                return [], 0
+            logger.warning(
+                "No company payloads captured, falling back to the DOM"
+            )
 
-        for company_element in company_elements:
-            company_data = await self.company_scraper._process_company(
-                company_element, job_type, location
+        outcome = await wait_for_any(
+            page,
+            {
+                "results": Condition(
+                    selector=_RESULT_SELECTOR, min_count=offset + 1
+                ),
+                "captcha": _CAPTCHA,
+            },
+            timeout=timeout,
+        )
+        if outcome == "captcha":
+            raise Throttled("captcha")
+        if outcome is None:
+            return [], 0
+
+        company_elements = await page.query_selector_all(_RESULT_SELECTOR)
+        # Elements read before scrolling are not parsed again
+        company_elements = company_elements[offset:]
+        logger.info(f"Found {len(company_elements)} companies on page")
+        details = await asyncio.gather(
+            *(
+                self.company_scraper._get_company_details(element)
+                for element in company_elements
             )
-            if company_data:
-                companies.append(company_data)
+        )
+        return [listing for listing in details if listing], len(details)
+
+    @staticmethod
+    def _report_listings(url: str, listings: List[Dict], first: bool) -> None:
+        """Tell the host's throttle how a batch of results went.
+
+        Only a search's first batch is expected to have results, later ones
+        are empty at the end of the results.
+        """
+        throttle = throttles.for_url(url)
+        if listings:
+            throttle.success()
+        elif first:
+            throttle.empty()
+
+    async def _load_page(self, page_url: str, first: bool) -> List[Dict]:
+        """Load a results page and read it, again if it was throttled."""
+        for attempt in range(_THROTTLE_RETRIES + 1):
+            capture = self._new_capture()
+            async with self.search_pool.open(
+                page_url, prepare=capture.attach if capture else None
+            ) as page:
+                try:
+                    listings, _ = await self._read_listings(page, capture)
+                    self._report_listings(page_url, listings, first)
+                    return listings
+                except Throttled as e:
+                    # The next load waits for the slower rate or the pause
+                    throttles.for_url(page_url).throttled(e.reason)
+                    if attempt == _THROTTLE_RETRIES:
+                        raise
+                    logger.warning(f"{e} on {page_url}, loading it again")
+                finally:
+                    if capture:
+                        await capture.detach()
+
+    async def _paginate(self, url: str) -> AsyncIterator[List[Dict]]:
+        """Yield the listings of each numbered results page in turn."""
+        for page_number in range(1, max(1, self.config.max_pages) + 1):
+            page_url = self._page_url(url, page_number)
+            logger.info(f"Scraping companies from: {page_url}")
+            yield await self._load_page(page_url, first=page_number == 1)
+
+    async def _scroll(self, url: str) -> AsyncIterator[List[Dict]]:
+        """Yield a page's first results, then each batch scrolling loads."""
+        logger.info(f"Scraping companies from: {url}")
+        capture = self._new_capture()
+        async with self.search_pool.open(
+            url, prepare=capture.attach if capture else None
+        ) as page:
+            try:
+                listings, read = await self._read_listings(page, capture)
+                self._report_listings(url, listings, first=True)
+                yield listings
+
+                for _ in range(max(1, self.config.max_pages) - 1):
+                    if capture:
+                        capture.clear()
+                    await page.evaluate(
+                        "window.scrollTo(0, document.body.scrollHeight)"
+                    )
+                    listings, count = await self._read_listings(
+                        page,
+                        capture,
+                        offset=read,
+                        timeout=self.config.scroll_timeout,
+                    )
+                    self._report_listings(url, listings, first=False)
+                    read += count
+                    yield listings
+            except Throttled as e:
+                throttles.for_url(url).throttled(e.reason)
+                raise
+            finally:
+                if capture:
+                    await capture.detach()
+
+    async def _crawl_search(
+        self, url: str, job_type: str, location: str
+    ) -> AsyncIterator[List[CompanyRecord]]:
+        """Crawl a search's results, yielding each batch's new companies.
+
+        Crawling stops at max_pages or max_results, when a batch has no new
+        results, or when every company in a batch was seen in an earlier run.
+        With incremental crawling it also stops at the first result that
+        topped the search last time, and skips the search entirely when its
+        top results haven't changed.
+        """
+        limit = self.config.max_results
+        crawled = 0
+        names = set()
+        state = (
+            get_search_state(job_type, location)
+            if self.config.incremental
+            else None
+        )
+        known = set(state["top_fingerprints"]) if state else set()
+        head: List[str] = []
+        completed = capped = failed = False
+        batches = (
+            self._scroll(url)
+            if self.config.pagination == "scroll"
+            else self._paginate(url)
+        )
+        try:
+            async for listings in batches:
+                listings = [
+                    listing
+                    for listing in listings
+                    if listing["company_name"] not in names
+                ]
+                if limit:
+                    listings = listings[: limit - crawled]
+                if not listings:
+                    logger.info(f"No more results for {url}")
+                    break
+
+                fingerprints = [
+                    listing_fingerprint(listing) for listing in listings
+                ]
+                if not head:
+                    head = fingerprints[: self.config.search_state_size]
+                    if state and head == state["top_fingerprints"]:
+                        logger.info(
+                            f"Results unchanged since {state['last_run_at']}, "
+                            f"skipping {url}"
+                        )
+                        break
+
+                # Results are newest first, so everything from the previous
+                # run's top results onwards was crawled then
+                reached = next(
+                    (
+                        index
+                        for index, fingerprint in enumerate(fingerprints)
+                        if fingerprint in known
+                    ),
+                    None,
+                )
+                if reached is not None:
+                    listings = listings[:reached]
+
+                names.update(listing["company_name"] for listing in listings)
+                crawled += len(listings)
+                capped = bool(limit) and crawled >= limit
+
+                fresh, unseen = self.company_scraper.filter_listings(listings)
+                if fresh:
+                    companies, errors = await self._gather_companies(
+                        self.company_scraper._process_company_data(
+                            listing, job_type, location
+                        )
+                        for listing in fresh
+                    )
+                    failed = failed or bool(errors)
+                    yield companies
+
+                if reached is not None:
+                    logger.info(f"Reached results from the last run of {url}")
+                    break
+                if not unseen:
+                    logger.info(
+                        f"Only previously seen companies left for {url}, "
+                        "stopping"
+                    )
+                    break
+                if capped:
+                    logger.info(f"Reached {limit} results for {url}")
+                    break
+            completed = True
+        finally:
+            await batches.aclose()
+            # A crawl cut short, by an error or by max_results, or with
+            # companies that failed to load leaves the old state, so the
+            # results it missed are crawled next time
+            if (
+                completed
+                and not capped
+                and not failed
+                and head
+                and self.config.incremental
+            ):
+                save_search_state(job_type, location, head)
+
+    async def _gather_companies(
+        self, company_tasks
+    ) -> Tuple[List[CompanyRecord], int]:
+        """Process the companies of a search page concurrently.
+
+        Returns:
+            The companies processed, and the number that failed
+        """
+        # Profile pages are fetched concurrently through the tab pool;
+        # gather keeps the results in the order they appear on the page
+        results = await asyncio.gather(*company_tasks, return_exceptions=True)
+
+        companies = []
+        errors = 0
+        for result in results:
+            if isinstance(result, ProfileUnavailable):
+                # Already logged where the page failed to load
+                errors += 1
+            elif isinstance(result, Exception):
+                errors += 1
+                logger.error(
+                    f"Error processing company: {str(result)}",
+                    exc_info=result,
+                )
+            elif result:
+                companies.append(result)
 
         logger.info(
             f"Successfully processed {len(companies)} companies from page"
         )
-        return companies
+        return companies, errors
 
     def _build_search_url(
         self, job_title: str, location: Optional[str] = None
@@ -219,55 +675,143 @@ class WellfoundScraper:
             return f"{self.config.base_url}/role/l/{job_title.replace(' ', '-')}/{location.replace(' ', '-')}"
         return f"{self.config.base_url}/role/r/{job_title.replace(' ', '-')}?countryCodes[]=US"
 
-    async def scrape(self) -> pd.DataFrame:
-        """Main method to scrape all companies based on configuration."""
+    def _build_queries(self) -> List[Tuple[str, str, str]]:
+        """Build (url, job_title, location) for every local and remote search."""
+        queries = [
+            (self._build_search_url(job, location), job, location)
+            for job in self.config.job_titles
+            for location in self.config.locations
+        ]
+        queries.extend(
+            (self._build_search_url(job), job, "remote")
+            for job in self.config.job_titles
+        )
+        return queries
+
+    async def _scrape_query(
+        self,
+        url: str,
+        job_type: str,
+        location: str,
+        batches: asyncio.Queue,
+    ) -> None:
+        """Queue a search's batches, logging failures instead of raising."""
+        logger.info(f"Scraping {job_type} positions in {location}")
+        try:
+            async for companies in self._crawl_search(url, job_type, location):
+                await batches.put(companies)
+        except Throttled as e:
+            # Crawled again next run, since its incremental state isn't saved
+            logger.warning(f"Stopped scraping {url}: {e}")
+            metrics.increment("wellfound_failures", reason="throttled")
+        except Exception as e:
+            logger.error(f"Error scraping search page: {url}", exc_info=True)
+            metrics.increment("wellfound_failures", reason=type(e).__name__)
+        finally:
+            await batches.put(_QUERY_DONE)
+
+    async def scrape_iter(self) -> AsyncIterator[List[CompanyRecord]]:
+        """Scrape all searches concurrently, yielding batches as they finish."""
         logger.info("Starting Wellfound scraping process")
-        all_companies = []
+        total_companies = 0
+        batches = asyncio.Queue()
+        tasks = [
+            asyncio.create_task(
+                self._scrape_query(url, job, location, batches)
+            )
+            for url, job, location in (
+                self._build_queries() if self.queries is None else self.queries
+            )
+        ]
 
         try:
-            # Scrape local jobs
-            for job in self.config.job_titles:
-                for location in self.config.locations:
-                    logger.info(f"Scraping {job} positions in {location}")
-                    url = self._build_search_url(job, location)
-                    companies = await self._get_companies_from_page(
-                        url, job, location
-                    )
-                    all_companies.extend(companies)
-
-            # Scrape remote jobs
-            for job in self.config.job_titles:
-                logger.info(f"Scraping remote {job} positions")
-                url = self._build_search_url(job)
-                companies = await self._get_companies_from_page(
-                    url, job, "remote"
-                )
-                all_companies.extend(companies)
-
+            remaining = len(tasks)
+            while remaining:
+                companies = await batches.get()
+                if companies is _QUERY_DONE:
+                    remaining -= 1
+                    continue
+                total_companies += len(companies)
+                yield companies
         except Exception:
             logger.error("Error during scraping process", exc_info=True)
             raise
         finally:
-            if self.browser:
-                logger.info("Closing browser")
-                self.browser.stop()
+            for task in tasks:
+                task.cancel()
+            if self.search_pool:
+                await self.manager.close_pool(self.search_pool)
+            if self.company_scraper:
+                self.company_scraper.seen_index.flush()
+                await self.manager.close_pool(
+                    self.company_scraper.tab_pool
+                )
+            if self.owns_manager:
+                await self.manager.close()
 
         logger.info(
-            f"Scraping completed. Total companies processed: {len(all_companies)}"
+            f"Scraping completed. Total companies processed: {total_companies}"
         )
-        return pd.DataFrame(all_companies)
 
+    async def scrape(self) -> List[CompanyRecord]:
+        """Main method to scrape all companies based on configuration."""
+        all_companies = []
+        async for companies in self.scrape_iter():
+            all_companies.extend(companies)
+        return all_companies
 
-async def get_jobs_wellfound() -> pd.DataFrame:
-    """Entry point function to get jobs from Wellfound."""
-    logger.info("Initializing Wellfound job scraper")
-    config = WellfoundConfig(
+
+def get_wellfound_config() -> WellfoundConfig:
+    """Build the scraper configuration from config.py."""
+    return WellfoundConfig(
         job_titles=WELLFOUND_CONFIG["job_titles"],
         locations=WELLFOUND_CONFIG["locations"],
         max_company_size=WELLFOUND_CONFIG["max_company_size"],
         base_url=WELLFOUND_CONFIG["base_url"],
+        profile_tabs=WELLFOUND_CONFIG.get("profile_tabs", 1),
+        max_requests_per_host=WELLFOUND_CONFIG.get("max_requests_per_host"),
+        search_tabs=WELLFOUND_CONFIG.get("search_tabs", 1),
+        max_in_flight=WELLFOUND_CONFIG.get("max_in_flight", 4),
+        page_timeout=WELLFOUND_CONFIG.get("page_timeout", 30),
+        extraction_mode=WELLFOUND_CONFIG.get("extraction_mode", "dom"),
+        workers=WELLFOUND_CONFIG.get("workers", 1),
+        pagination=WELLFOUND_CONFIG.get("pagination", "pages"),
+        max_pages=WELLFOUND_CONFIG.get("max_pages", 1),
+        max_results=WELLFOUND_CONFIG.get("max_results"),
+        scroll_timeout=WELLFOUND_CONFIG.get("scroll_timeout", 5),
+        incremental=WELLFOUND_CONFIG.get("incremental", True),
+        search_state_size=WELLFOUND_CONFIG.get("search_state_size", 10),
+        browser=get_browser_profile(),
     )
 
-    scraper = WellfoundScraper(config)
+
+async def iter_jobs_wellfound(
+    manager: Optional[BrowserManager] = None,
+) -> AsyncIterator[List[CompanyRecord]]:
+    """Entry point that streams each search page's companies as it finishes.
+
+    The searches run in manager's shared browser when one is given. With
+    more than one worker configured, they are split across browser
+    processes instead.
+    """
+    logger.info("Initializing Wellfound job scraper")
+    config = get_wellfound_config()
+    if config.workers > 1:
+        from core.scrapers.sharded import ShardedScraper
+
+        async for companies in ShardedScraper(config).scrape_iter():
+            yield companies
+        return
+
+    scraper = WellfoundScraper(config, manager=manager)
+    await scraper.initialize()
+    async for companies in scraper.scrape_iter():
+        yield companies
+
+
+async def get_jobs_wellfound() -> List[CompanyRecord]:
+    """Entry point function to get jobs from Wellfound."""
+    logger.info("Initializing Wellfound job scraper")
+    scraper = WellfoundScraper(get_wellfound_config())
     await scraper.initialize()
     return await scraper.scrape()
@@ -1,138 +1,422 @@
-import nodriver as uc
-from config.config import WELLFOUND_CONFIG, OUR_NAME
-from core.database.sqlite import add_company_sent
-from core.scrapers.wellfound import get_jobs_wellfound
-from core.apollo.apollo import get_apollo_emails
-from core.email.client import EmailClient
-import pandas as pd
+import argparse
+import asyncio
 import logging
+import time
+from typing import TYPE_CHECKING, List, Optional
+from config.config import (
+    METRICS_CONFIG,
+    OUR_NAME,
+    PIPELINE_CONFIG,
+    WELLFOUND_CONFIG,
+)
+from core.database.sqlite import (
+    STAGE_ENRICHED,
+    STAGE_SCRAPED,
+    STAGE_SENT,
+    add_company_sent,
+    company_sent_before,
+    count_companies,
+    count_companies_sent_on,
+    get_companies_in_stage,
+    get_size_counts,
+    get_stage_counts,
+    set_company_stage,
+)
+from core.pipeline.pipeline import Pipeline, PipelineConfig, StageStopped
+from core.pipeline.records import CompanyRecord
 from utils.generate_random_yopmail import generate_random_yopmail
+from utils.log_config import configure_logging
+from utils.metrics import metrics, serve_prometheus
+
+# The browser, Apollo and email modules are imported inside the commands
+# that use them, so commands like report start without loading them
+if TYPE_CHECKING:
+    from core.browser.manager import BrowserManager
+    from core.email.client import EmailClient, EmailContent
 
-# Configure logging
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.INFO)
 
-# Create console handler with formatting
-console_handler = logging.StreamHandler()
-console_handler.setLevel(logging.INFO)
-formatter = logging.Formatter(
-    "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
-console_handler.setFormatter(formatter)
-logger.addHandler(console_handler)
+
+def record_stage(
+    company: CompanyRecord, stage: str, error: Optional[str] = None
+) -> bool:
+    """Store the pipeline stage a company reached in pipeline_state."""
+    return set_company_stage(company.to_dict(), stage, error)
+
+
+def companies_in_stage(stage: str) -> List[CompanyRecord]:
+    """Get the companies whose latest pipeline stage is stage."""
+    return [
+        CompanyRecord.from_dict(row) for row in get_companies_in_stage(stage)
+    ]
 
 
 class JobProcessor:
     def __init__(self):
-        self.email_client = EmailClient.from_env()
+        self._email_client = None
+        self._browser_manager = None
+        self.pipeline_config = PipelineConfig(**PIPELINE_CONFIG)
+        # Companies emailed this run, kept for --export
+        self.sent_companies: List[CompanyRecord] = []
+
+    def start_email_client(self) -> None:
+        """Create the email client, compiling and checking the templates.
+
+        Commands that send call this before any other work, so a broken
+        template stops the run before scraping, and every send worker
+        shares one client and its rate limits. SMTP connections are only
+        opened once the first email is sent.
+        """
+        if self._email_client is None:
+            from core.email.client import EmailClient
+
+            self._email_client = EmailClient.from_env()
+
+    @property
+    def email_client(self) -> "EmailClient":
+        """The email client, created on first use."""
+        self.start_email_client()
+        return self._email_client
+
+    @property
+    def browser_manager(self) -> "BrowserManager":
+        """The browser shared by the Wellfound and Apollo stages.
+
+        Chrome is only started once a stage first needs it.
+        """
+        if self._browser_manager is None:
+            from core.browser.manager import BrowserManager
+            from core.browser.profile import get_browser_profile
+
+            self._browser_manager = BrowserManager(get_browser_profile())
+        return self._browser_manager
+
+    def close(self) -> None:
+        """Finish queued emails if the email client was used."""
+        if self._email_client is not None:
+            self._email_client.close()
+
+    async def process_companies(
+        self, scrape: bool = True, enrich: bool = True, send: bool = True
+    ) -> None:
+        """Main processing pipeline for company data.
 
-    async def process_companies(self) -> None:
-        """Main processing pipeline for company data."""
+        Stages that are skipped leave companies in pipeline_state for a later
+        command. Without scrape, companies an earlier run scraped or enriched
+        but never finished are picked up instead of scraping Wellfound again.
+        """
+        apollo_client = None
         try:
-            logger.info("Starting company processing pipeline")
-            # Get company data
-            df = await get_jobs_wellfound()
-            if df.empty:
-                logger.warning("No companies found to process")
-                return
+            if send:
+                # On the event loop, before the send workers' threads start
+                self.start_email_client()
+
+            pending_enrich, pending_send = [], []
+            if not scrape:
+                if enrich:
+                    pending_enrich = companies_in_stage(STAGE_SCRAPED)
+                if send:
+                    pending_send = self._companies_to_send()
+                logger.info(
+                    f"Resuming {len(pending_enrich)} companies awaiting Apollo "
+                    f"and {len(pending_send)} awaiting email"
+                )
 
-            # Enrich with contact information
-            df = await get_apollo_emails(df)
-            if df.empty:
-                logger.warning("No contact information found")
-                return
+            source = None
+            if scrape:
+                from core.scrapers.wellfound import iter_jobs_wellfound
 
-            # Process each company
-            self._store_company_data(df)
+                logger.info("Starting company processing pipeline")
+                source = iter_jobs_wellfound(self.browser_manager)
+
+            if enrich and (source is not None or pending_enrich):
+                from core.apollo.apollo import get_apollo_client
+
+                apollo_client = get_apollo_client(self.browser_manager)
+                if source is not None:
+                    # Log in to Apollo while the first search pages are scraped
+                    apollo_client.initialize_in_background()
+
+            pipeline = Pipeline(
+                self.pipeline_config,
+                enrich=apollo_client.enrich_company if apollo_client else None,
+                send=self._send_company_async if send else None,
+                record_stage=record_stage,
+            )
+            stats = await pipeline.run(source, pending_enrich, pending_send)
+            if not (stats.scraped or pending_enrich or pending_send):
+                logger.warning("No companies found to process")
 
         except Exception as e:
             logger.error(f"Error in main processing: {str(e)}", exc_info=True)
+        finally:
+            if apollo_client:
+                await apollo_client.close()
+            if self._browser_manager is not None:
+                await self._browser_manager.close()
 
-    def _store_company_data(self, df: pd.DataFrame) -> None:
-        """Store processed company data in database."""
-        total_companies = len(df)
-        successful_sends = 0
-        logger.info(
-            f"Starting email sending process for {total_companies} companies"
+    def _companies_to_send(self) -> List[CompanyRecord]:
+        """Get the enriched companies that still need their email.
+
+        A run stopped between sending an email and recording the sent stage
+        leaves the company enriched, so companies already in companies_sent
+        are marked sent instead of being emailed twice.
+        """
+        companies = []
+        for company in companies_in_stage(STAGE_ENRICHED):
+            if company_sent_before(company.company_name):
+                logger.info(f"{company.company_name} was already emailed")
+                record_stage(company, STAGE_SENT)
+            else:
+                companies.append(company)
+        return companies
+
+    def preview_companies(self) -> None:
+        """Log the emails the send command would send, without sending them."""
+        companies = self._companies_to_send()
+        contents = self.email_client.render_many(
+            {
+                "recipient_name": company.contact_name,
+                "company_name": company.company_name,
+            }
+            for company in companies
         )
+        for company, content in zip(companies, contents):
+            logger.info(
+                f"Would email {company.contact_name} <{company.email}> at "
+                f"{company.company_name} ({content.variant}): {content.subject}"
+            )
+        logger.info(f"{len(companies)} emails ready to send")
 
-        for index, row in df.iterrows():
-            try:
-                email = (
-                    generate_random_yopmail()
-                    if WELLFOUND_CONFIG["is_test_mode"]
-                    else row["email"]
-                )
-                contact_name = row["contact_name"]
-                company_name = row["company_name"]
+    async def _send_company_async(self, company: CompanyRecord) -> bool:
+        """Send and store a company without blocking the event loop.
 
-                logger.info(
-                    f"Processing company {index + 1}/{total_companies}: "
-                    f"{company_name} (Contact: {contact_name}, Email: {email})"
-                )
+        Raises:
+            StageStopped: Once the daily limit is used up, which leaves the
+                remaining companies enriched for the next run
+        """
+        from core.email.sender import DailyLimitReached
 
-                if self.email_client:
-                    # Try to send email first
-                    logger.debug(f"Attempting to send email to {email}")
-                    sent = self.email_client.send_email(
-                        recipient_email=email,
-                        recipient_name=contact_name,
-                        company_name=company_name,
-                    )
-
-                    if sent:
-                        logger.info(
-                            f"Successfully sent email to {company_name}"
-                        )
-                        successful_sends += 1
-
-                        # Store in database
-                        logger.debug(f"Storing {company_name} in database")
-                        stored = add_company_sent(
-                            contactee_name=OUR_NAME,
-                            status="Pending",
-                            company_name=company_name,
-                            description=row["description"],
-                            job_type=row["job_type"],
-                            size=row["size"],
-                            location=row["location"],
-                            website=row["website"],
-                            contact_name=contact_name,
-                            email=email,
-                        )
-                        if stored:
-                            logger.debug(
-                                f"Successfully stored {company_name} in database"
-                            )
-                        else:
-                            logger.warning(
-                                f"Failed to store {company_name} in database"
-                            )
-                    else:
-                        logger.warning(
-                            f"Failed to send email to {company_name}"
-                        )
-                else:
-                    logger.error("No email client available")
-
-            except Exception as e:
-                logger.error(
-                    f"Error processing company {row['company_name']}: {str(e)}",
-                    exc_info=True,
-                )
+        try:
+            return await asyncio.to_thread(self._send_company, company)
+        except DailyLimitReached as e:
+            raise StageStopped(str(e)) from e
+
+    def _send_company(
+        self,
+        company: CompanyRecord,
+        content: Optional["EmailContent"] = None,
+    ) -> bool:
+        """Email a company's contact and record it in the database.
+
+        content is the pre-rendered email when sending a batch, otherwise
+        it is rendered here.
+        """
+        email = (
+            generate_random_yopmail()
+            if WELLFOUND_CONFIG["is_test_mode"]
+            else company.email
+        )
+        contact_name = company.contact_name
+        company_name = company.company_name
 
         logger.info(
-            f"Email sending completed. Success rate: {successful_sends}/{total_companies} "
-            f"({(successful_sends / total_companies) * 100:.1f}%)"
+            f"Processing company: {company_name} "
+            f"(Contact: {contact_name}, Email: {email})"
+        )
+
+        if content is None:
+            # Rendered here to know which variant is stored with the company
+            content = self.email_client.render_many(
+                [{"recipient_name": contact_name, "company_name": company_name}]
+            )[0]
+
+        # Try to send email first
+        logger.debug(f"Attempting to send email to {email}")
+        sent = self.email_client.send_email(
+            recipient_email=email,
+            recipient_name=contact_name,
+            company_name=company_name,
+            content=content,
+        )
+
+        if not sent:
+            logger.warning(f"Failed to send email to {company_name}")
+            return False
+
+        logger.info(f"Successfully sent email to {company_name}")
+
+        # Store in database
+        logger.debug(f"Storing {company_name} in database")
+        stored = add_company_sent(
+            contactee_name=OUR_NAME,
+            status="Pending",
+            company_name=company_name,
+            description=company.description,
+            job_type=company.job_type,
+            size=company.size,
+            location=company.location,
+            website=company.website,
+            contact_name=contact_name,
+            email=email,
+            variant=content.variant,
         )
+        if stored:
+            logger.debug(f"Successfully stored {company_name} in database")
+        else:
+            logger.warning(f"Failed to store {company_name} in database")
+        self.sent_companies.append(company)
+        return True
+
+
+def report() -> None:
+    """Print how many companies are at each stage."""
+    stages = get_stage_counts()
+    print(f"Companies seen: {count_companies('companies_seen')}")
+    print(f"Companies emailed: {count_companies('companies_sent')}")
+    print(
+        "Emailed today: "
+        f"{count_companies_sent_on(time.strftime('%Y-%m-%d'))}"
+    )
+    print("Pipeline stages:")
+    for stage in ("scraped", "enriched", "sent", "failed"):
+        print(f"  {stage}: {stages.get(stage, 0)}")
+    print("Companies emailed by size:")
+    for size, count in get_size_counts("companies_sent"):
+        print(f"  {size}: {count}")
+
+
+# Pipeline stages each command runs as (scrape, enrich, send)
+COMMAND_STAGES = {
+    "run": (True, True, True),
+    "scrape": (True, False, False),
+    "enrich": (False, True, False),
+    "send": (False, False, True),
+    "resume": (False, True, True),
+}
+
 
+def report_metrics() -> None:
+    """Log the run's timers and counters and append them to the JSONL file."""
+    if METRICS_CONFIG["summary"]:
+        logger.info(f"Run metrics:\n{metrics.summary_table()}")
+    if METRICS_CONFIG["jsonl_path"]:
+        metrics.write_jsonl(METRICS_CONFIG["jsonl_path"])
+        logger.info(f"Metrics written to {METRICS_CONFIG['jsonl_path']}")
 
-async def main():
-    logger.info("Starting job processing")
+
+async def main(
+    command: str = "run",
+    export: Optional[str] = None,
+    dry_run: bool = False,
+):
+    logger.info(f"Starting job processing: {command}")
+    if METRICS_CONFIG["prometheus_port"]:
+        serve_prometheus(metrics, METRICS_CONFIG["prometheus_port"])
+        logger.info(
+            "Serving metrics at "
+            f"http://127.0.0.1:{METRICS_CONFIG['prometheus_port']}/metrics"
+        )
     processor = JobProcessor()
-    await processor.process_companies()
+    try:
+        if dry_run:
+            processor.preview_companies()
+        else:
+            scrape, enrich, send = COMMAND_STAGES[command]
+            await processor.process_companies(scrape, enrich, send)
+    finally:
+        processor.close()
+        report_metrics()
+    if export:
+        from core.pipeline.records import export_records
+
+        count = export_records(processor.sent_companies, export)
+        logger.info(f"Exported {count} sent companies to {export}")
     logger.info("Job processing completed")
 
 
+def serve_browser() -> None:
+    """Run the shared browser until interrupted."""
+    import nodriver as uc
+    from core.browser.manager import BrowserManager
+    from core.browser.profile import get_browser_profile
+
+    manager = BrowserManager(get_browser_profile())
+    loop = uc.loop()
+    try:
+        loop.run_until_complete(manager.serve())
+    except KeyboardInterrupt:
+        loop.run_until_complete(manager.close())
+        logger.info("Browser daemon stopped")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command line parser."""
+    parser = argparse.ArgumentParser(description="TCG outreach pipeline")
+    parser.add_argument(
+        "-v", "--verbose", action="store_true", help="show debug logs"
+    )
+    commands = parser.add_subparsers(dest="command", metavar="command")
+
+    export_parent = argparse.ArgumentParser(add_help=False)
+    export_parent.add_argument(
+        "--export",
+        metavar="PATH",
+        help="write the companies emailed to a .parquet or .arrow file",
+    )
+
+    commands.add_parser(
+        "run",
+        parents=[export_parent],
+        help="scrape, enrich and email companies (the default)",
+    )
+    commands.add_parser(
+        "scrape", help="scrape Wellfound and store companies to enrich later"
+    )
+    commands.add_parser(
+        "enrich", help="look up contacts for scraped companies on Apollo"
+    )
+    send = commands.add_parser(
+        "send", parents=[export_parent], help="email enriched companies"
+    )
+    send.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="show the emails that would be sent without sending them",
+    )
+    commands.add_parser(
+        "resume",
+        parents=[export_parent],
+        help="finish companies left scraped or enriched by an earlier run",
+    )
+    commands.add_parser(
+        "report", help="show how many companies are at each stage"
+    )
+    commands.add_parser(
+        "browser",
+        help="keep a browser running that later runs connect to, "
+        "skipping Chrome startup and keeping sessions warm",
+    )
+    return parser
+
+
 if __name__ == "__main__":
-    uc.loop().run_until_complete(main())
+    args = build_parser().parse_args()
+    configure_logging(logging.DEBUG if args.verbose else logging.INFO)
+    command = args.command or "run"
+
+    if command == "report":
+        report()
+    elif command == "browser":
+        serve_browser()
+    elif command in ("run", "scrape", "enrich", "resume"):
+        # nodriver drives the browser from its own event loop
+        import nodriver as uc
+
+        uc.loop().run_until_complete(
+            main(command, export=getattr(args, "export", None))
+        )
+    else:
+        asyncio.run(
+            main(command, export=args.export, dry_run=args.dry_run)
+        )
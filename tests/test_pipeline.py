@@ -0,0 +1,50 @@
+import asyncio
+
+from core.database.sqlite import STAGE_ENRICHED, STAGE_FAILED, STAGE_SENT
+from core.pipeline.pipeline import Pipeline, PipelineConfig, StageStopped
+from core.pipeline.records import CompanyRecord
+
+
+def _run(send, companies):
+    stages = {company.company_name: STAGE_ENRICHED for company in companies}
+
+    def record_stage(company, stage, error=None):
+        stages[company.company_name] = stage
+        return True
+
+    pipeline = Pipeline(
+        PipelineConfig(send_workers=2), send=send, record_stage=record_stage
+    )
+    stats = asyncio.run(pipeline.run(pending_send=companies))
+    return stats, stages
+
+
+def test_stopped_sending_leaves_companies_enriched():
+    attempts = []
+
+    async def send(company):
+        attempts.append(company.company_name)
+        if len(attempts) > 1:
+            raise StageStopped("Daily limit of 1 emails reached")
+        return True
+
+    companies = [CompanyRecord(f"Company {index}") for index in range(5)]
+    stats, stages = _run(send, companies)
+
+    assert stats.sent == 1
+    assert stats.failed == 0
+    assert list(stages.values()).count(STAGE_SENT) == 1
+    assert list(stages.values()).count(STAGE_ENRICHED) == 4
+    # Both workers may have started a send before the first one stopped
+    assert len(attempts) <= 3
+
+
+def test_failed_sends_are_recorded():
+    async def send(company):
+        return company.company_name != "Bounces"
+
+    companies = [CompanyRecord("Bounces"), CompanyRecord("Delivers")]
+    stats, stages = _run(send, companies)
+
+    assert stats.sent == 1
+    assert stages == {"Bounces": STAGE_FAILED, "Delivers": STAGE_SENT}
@@ -0,0 +1,80 @@
+import socket
+
+import pytest
+
+from benchmarks.smtp_sink import SMTPSink
+from core.email.sender import (
+    DailyLimitReached,
+    EmailSender,
+    RenderedMessage,
+    SendLimits,
+    SMTPSettings,
+)
+from utils.rate_limit import ThrottleSettings, get_throttle_settings, throttles
+
+
+@pytest.fixture(autouse=True)
+def no_throttling():
+    """Send as fast as the sink answers, like the benchmarks."""
+    throttles.configure(ThrottleSettings(enabled=False))
+    yield
+    throttles.configure(get_throttle_settings())
+
+
+def _message(index: int = 0) -> RenderedMessage:
+    return RenderedMessage(
+        sender="sender@example.com",
+        recipients=[f"founder{index}@example.com"],
+        data=b"Subject: Hello\r\n\r\nHello\r\n",
+    )
+
+
+def _sender(port: int, per_day: int, connections: int = 2) -> EmailSender:
+    return EmailSender(
+        SMTPSettings(
+            user="sender@example.com",
+            password="",
+            host="127.0.0.1",
+            port=port,
+            use_ssl=False,
+            timeout=5,
+        ),
+        connections=connections,
+        limits=SendLimits(per_minute=None, per_day=per_day),
+        max_retries=0,
+        retry_backoff=0,
+    )
+
+
+def _closed_port() -> int:
+    """A local port nothing listens on, so connecting is refused."""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def test_sends_in_parallel_up_to_the_daily_limit():
+    with SMTPSink() as sink:
+        sender = _sender(sink.port, per_day=4)
+        try:
+            futures = [sender.submit(_message(i)) for i in range(6)]
+            errors = [future.exception() for future in futures]
+        finally:
+            sender.close()
+
+    assert errors.count(None) == 4
+    assert sum(isinstance(e, DailyLimitReached) for e in errors) == 2
+    assert sink.messages == 4
+
+
+def test_failed_sends_leave_the_daily_quota():
+    sender = _sender(_closed_port(), per_day=1, connections=1)
+    try:
+        assert not sender.send(_message())
+        assert not sender.send(_message())
+        # Neither failure used the only email allowed today
+        sender.rate_limit.acquire()
+        with pytest.raises(DailyLimitReached):
+            sender.rate_limit.acquire()
+    finally:
+        sender.close()
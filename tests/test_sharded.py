@@ -0,0 +1,113 @@
+import asyncio
+import os
+
+import pytest
+
+from core.database import sqlite
+from core.database.sqlite import DatabaseManager, SeenCompanyIndex
+from core.pipeline.records import CompanyRecord
+from core.scrapers.sharded import _DONE, _PAGE, ShardedScraper
+from core.scrapers.wellfound import WellfoundConfig
+from utils.rate_limit import ThrottleSettings, get_throttle_settings, throttles
+
+
+def stub_worker(config, index, queries, results, stop, throttle) -> None:
+    """Send a page per query, each with a company every worker also finds."""
+    for _, job_type, location in queries:
+        results.put(
+            (
+                _PAGE,
+                index,
+                [
+                    CompanyRecord(f"{job_type} {location}"),
+                    CompanyRecord("Found by everyone"),
+                ],
+            )
+        )
+    results.put((_DONE, index, None))
+
+
+def crashing_worker(config, index, queries, results, stop, throttle) -> None:
+    """Worker 0 scrapes as usual while worker 1 dies without a word."""
+    if index == 1:
+        os._exit(1)
+    stub_worker(config, index, queries, results, stop, throttle)
+
+
+def rate_reporting_worker(config, index, queries, results, stop, throttle):
+    """Report the rates the worker was given as a company name."""
+    rates = f"{throttle.start_per_minute:g}/{throttle.max_per_minute:g}"
+    results.put((_PAGE, index, [CompanyRecord(f"{index}: {rates}")]))
+    results.put((_DONE, index, None))
+
+
+def _scrape(run_worker) -> list:
+    config = WellfoundConfig(
+        job_titles=["data science", "software engineer"],
+        locations=["san diego"],
+        max_company_size=100,
+    )
+    scraper = ShardedScraper(config, workers=2, run_worker=run_worker)
+
+    async def collect():
+        return [
+            company.company_name
+            async for companies in scraper.scrape_iter()
+            for company in companies
+        ]
+
+    return asyncio.run(collect())
+
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    """Point the database helpers at a scratch database."""
+    manager = DatabaseManager(str(tmp_path / "companies.db"))
+    monkeypatch.setattr(sqlite, "_db_manager", manager)
+    yield manager
+    manager.close()
+
+
+def test_companies_found_by_several_workers_are_yielded_once():
+    names = _scrape(stub_worker)
+
+    assert sorted(names) == [
+        "Found by everyone",
+        "data science remote",
+        "data science san diego",
+        "software engineer remote",
+        "software engineer san diego",
+    ]
+
+
+def test_a_worker_that_dies_doesnt_stop_the_others():
+    names = _scrape(crashing_worker)
+
+    assert sorted(names) == [
+        "Found by everyone",
+        "data science remote",
+        "data science san diego",
+    ]
+
+
+def test_workers_split_the_request_rates():
+    throttles.configure(
+        ThrottleSettings(start_per_minute=60, max_per_minute=600)
+    )
+    try:
+        names = _scrape(rate_reporting_worker)
+    finally:
+        throttles.configure(get_throttle_settings())
+
+    assert sorted(names) == ["0: 30/300", "1: 30/300"]
+
+
+def test_shared_seen_index_skips_companies_another_worker_added(database):
+    first = SeenCompanyIndex(shared=True)
+    second = SeenCompanyIndex(shared=True)
+
+    first.add("Acme", "Rockets", "swe", "11-50", "remote", "acme.com")
+
+    assert "Acme" in second
+    assert not second.add("Acme", "Rockets", "swe", "11-50", "remote", "")
+    assert "Globex" not in second
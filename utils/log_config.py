@@ -0,0 +1,28 @@
+import logging
+
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# Loggers of this project, third-party libraries stay at WARNING
+PROJECT_LOGGERS = ("__main__", "core", "utils")
+
+_configured = False
+
+
+def configure_logging(level: int = logging.INFO) -> None:
+    """Send log records to the console, once per process.
+
+    Modules only create their logger with logging.getLogger(__name__), the
+    entry point calls this to decide where and how much is shown.
+    """
+    global _configured
+    if _configured:
+        return
+    _configured = True
+
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    root = logging.getLogger()
+    root.addHandler(handler)
+    root.setLevel(logging.WARNING)
+    for name in PROJECT_LOGGERS:
+        logging.getLogger(name).setLevel(level)
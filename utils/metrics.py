@@ -0,0 +1,250 @@
+import bisect
+import json
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List, Tuple
+
+# Upper bounds in seconds of the histogram buckets, from a DOM check to a
+# page load that hit its timeout
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60
+)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, object]) -> Labels:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(
+        f'{name}="{value}"'.replace("\n", " ") for name, value in labels
+    )
+    return "{" + pairs + "}"
+
+
+class Histogram:
+    """Counts observations into buckets, keeping their count, sum and max."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by interpolating inside its bucket."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if seen + count >= rank and count:
+                lower = self.buckets[index - 1] if index else 0.0
+                upper = (
+                    self.buckets[index]
+                    if index < len(self.buckets)
+                    else self.max
+                )
+                return min(
+                    lower + (upper - lower) * (rank - seen) / count, self.max
+                )
+            seen += count
+        return self.max
+
+
+class MetricsRegistry:
+    """Thread-safe timers and counters for the whole run.
+
+    Timers are histograms of seconds, counters count events such as cache
+    hits or failures by reason. Both are keyed by a name and labels.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+
+    def observe(self, name: str, seconds: float, **labels) -> None:
+        """Record one duration in the name histogram."""
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            key = _labels(labels)
+            if key not in series:
+                series[key] = Histogram()
+            series[key].observe(seconds)
+
+    @contextmanager
+    def timer(self, name: str, **labels) -> Iterator[Dict[str, object]]:
+        """Time the block, also around awaits.
+
+        The block may add labels to the yielded dict, such as its outcome,
+        before the time is recorded.
+        """
+        labels = dict(labels)
+        start = time.perf_counter()
+        try:
+            yield labels
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def increment(self, name: str, amount: float = 1, **labels) -> None:
+        """Add to the name counter."""
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            key = _labels(labels)
+            series[key] = series.get(key, 0) + amount
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def to_prometheus(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                lines.append(f"# TYPE {name} counter")
+                for labels, value in sorted(series.items()):
+                    lines.append(f"{name}{_format_labels(labels)} {value}")
+            for name, series in sorted(self._histograms.items()):
+                lines.append(f"# TYPE {name} histogram")
+                for labels, histogram in sorted(series.items()):
+                    cumulative = 0
+                    bounds = [str(b) for b in histogram.buckets] + ["+Inf"]
+                    for bound, count in zip(bounds, histogram.counts):
+                        cumulative += count
+                        bucket_labels = _format_labels(
+                            labels + (("le", bound),)
+                        )
+                        lines.append(
+                            f"{name}_bucket{bucket_labels} {cumulative}"
+                        )
+                    formatted = _format_labels(labels)
+                    lines.append(f"{name}_sum{formatted} {histogram.sum}")
+                    lines.append(f"{name}_count{formatted} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> List[Dict]:
+        """Get every series as a JSON-friendly dict."""
+        records = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                for labels, value in sorted(series.items()):
+                    records.append(
+                        {
+                            "type": "counter",
+                            "name": name,
+                            "labels": dict(labels),
+                            "value": value,
+                        }
+                    )
+            for name, series in sorted(self._histograms.items()):
+                for labels, histogram in sorted(series.items()):
+                    records.append(
+                        {
+                            "type": "histogram",
+                            "name": name,
+                            "labels": dict(labels),
+                            "count": histogram.count,
+                            "sum": round(histogram.sum, 6),
+                            "max": round(histogram.max, 6),
+                            "p50": round(histogram.quantile(0.5), 6),
+                            "p95": round(histogram.quantile(0.95), 6),
+                            "buckets": dict(
+                                zip(
+                                    [str(b) for b in histogram.buckets]
+                                    + ["+Inf"],
+                                    histogram.counts,
+                                )
+                            ),
+                        }
+                    )
+        return records
+
+    def write_jsonl(self, path: str) -> None:
+        """Append every series to a JSONL file, one line each."""
+        recorded_at = time.strftime("%Y-%m-%dT%H:%M:%S")
+        with open(path, "a") as f:
+            for record in self.snapshot():
+                f.write(json.dumps({"time": recorded_at, **record}) + "\n")
+
+    def summary_table(self) -> str:
+        """Format the timers, busiest first, and the counters as a table."""
+        records = self.snapshot()
+        timers = sorted(
+            (r for r in records if r["type"] == "histogram"),
+            key=lambda r: r["sum"],
+            reverse=True,
+        )
+        counters = [r for r in records if r["type"] == "counter"]
+
+        def series_name(record: Dict) -> str:
+            labels = ",".join(f"{k}={v}" for k, v in record["labels"].items())
+            return f"{record['name']}{{{labels}}}" if labels else record["name"]
+
+        width = max([len(series_name(r)) for r in records] + [6])
+        lines = [
+            f"{'Timer':<{width}} {'count':>7} {'total s':>9} "
+            f"{'mean s':>8} {'p50 s':>8} {'p95 s':>8} {'max s':>8}"
+        ]
+        for record in timers:
+            mean = record["sum"] / record["count"] if record["count"] else 0
+            lines.append(
+                f"{series_name(record):<{width}} {record['count']:>7} "
+                f"{record['sum']:>9.2f} {mean:>8.3f} {record['p50']:>8.3f} "
+                f"{record['p95']:>8.3f} {record['max']:>8.3f}"
+            )
+        if counters:
+            lines.append("")
+            lines.append(f"{'Counter':<{width}} {'value':>7}")
+            for record in counters:
+                lines.append(
+                    f"{series_name(record):<{width}} {record['value']:>7g}"
+                )
+        return "\n".join(lines)
+
+
+def serve_prometheus(
+    registry: MetricsRegistry, port: int, host: str = "127.0.0.1"
+) -> ThreadingHTTPServer:
+    """Serve the registry at http://host:port/metrics from a daemon thread."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip("/") != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.to_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header(
+                "Content-Type", "text/plain; version=0.0.4; charset=utf-8"
+            )
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# Shared by every module, like the database manager
+metrics = MetricsRegistry()
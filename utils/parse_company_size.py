@@ -0,0 +1,23 @@
+import re
+from typing import Optional, Tuple
+
+_NUMBER = re.compile(r"\d[\d,]*")
+
+
+def parse_company_size(
+    size: Optional[str],
+) -> Tuple[Optional[int], Optional[int]]:
+    """Parse a size like "11-50", "10,001+ employees" or "5000+" into
+    (size_min, size_max).
+
+    An open ended size has no size_max, and a size without numbers such as
+    "Unknown" is (None, None).
+    """
+    if not size:
+        return None, None
+    numbers = [int(n.replace(",", "")) for n in _NUMBER.findall(size)]
+    if not numbers:
+        return None, None
+    if "+" in size:
+        return numbers[0], None
+    return numbers[0], numbers[-1]
@@ -0,0 +1,398 @@
+import asyncio
+import logging
+import threading
+import time
+from dataclasses import dataclass, replace
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Seconds callers wait between checks while a paused host is being probed
+PROBE_POLL_INTERVAL = 1.0
+
+
+class Throttled(Exception):
+    """Raised when a site answers with a sign of throttling, e.g. a CAPTCHA."""
+
+    def __init__(self, reason: str):
+        super().__init__(f"Throttled: {reason}")
+        self.reason = reason
+
+
+@dataclass
+class ThrottleSettings:
+    """How each host's request rate adapts, see THROTTLE_CONFIG."""
+
+    enabled: bool = True
+    start_per_minute: float = 60
+    min_per_minute: float = 6
+    max_per_minute: Optional[float] = 600
+    increase_per_minute: float = 6
+    decrease_factor: float = 0.5
+    empty_threshold: int = 5
+    failure_threshold: int = 5
+    pause_seconds: float = 60
+    max_pause_seconds: float = 900
+
+    def split(self, workers: int) -> "ThrottleSettings":
+        """Get one worker's share of the rates.
+
+        Each process throttles on its own, so workers scraping the same
+        host in separate processes each get a share of the rates to keep
+        their combined rate within the configured one.
+        """
+        workers = max(1, workers)
+        return replace(
+            self,
+            start_per_minute=self.start_per_minute / workers,
+            min_per_minute=self.min_per_minute / workers,
+            max_per_minute=(
+                self.max_per_minute / workers if self.max_per_minute else None
+            ),
+            increase_per_minute=self.increase_per_minute / workers,
+        )
+
+
+class AdaptiveRateLimiter:
+    """Token bucket whose rate adapts to the site, additive increase with
+    multiplicative decrease (AIMD).
+
+    Each success raises the rate by a fixed step and each sign of
+    throttling multiplies it down, so the rate settles just below what
+    the site tolerates. Thread-safe, with async and blocking acquire.
+    """
+
+    def __init__(
+        self,
+        rate_per_minute: Optional[float],
+        min_per_minute: float = 1,
+        max_per_minute: Optional[float] = None,
+        increase_per_minute: float = 1,
+        decrease_factor: float = 0.5,
+        burst: int = 1,
+        adaptive: bool = True,
+    ):
+        """A rate of None or 0 disables limiting.
+
+        A limiter that isn't adaptive keeps its rate, following only set_max.
+        """
+        self.adaptive = adaptive
+        self.min_per_minute = min_per_minute
+        self.max_per_minute = max_per_minute
+        self.increase_per_minute = increase_per_minute
+        self.decrease_factor = decrease_factor
+        self.capacity = max(1, burst)
+        self._rate = rate_per_minute or None
+        if self._rate and adaptive:
+            self._rate = self._clamp(self._rate)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def rate_per_minute(self) -> Optional[float]:
+        return self._rate
+
+    def _clamp(self, rate: float) -> float:
+        if self.max_per_minute:
+            rate = min(rate, self.max_per_minute)
+        return max(rate, self.min_per_minute)
+
+    def set_max(self, max_per_minute: Optional[float]) -> None:
+        """Cap the rate, e.g. at an account's published limit."""
+        with self._lock:
+            self.max_per_minute = max_per_minute
+            if not self.adaptive:
+                self._rate = max_per_minute or None
+            elif self._rate:
+                self._rate = self._clamp(self._rate)
+
+    def _reserve(self) -> float:
+        """Take a token, returning the seconds to wait before using it.
+
+        Tokens may be taken ahead, so waiters queue up without a lock held
+        while they sleep.
+        """
+        with self._lock:
+            if not self._rate:
+                return 0.0
+            now = time.monotonic()
+            rate = self._rate / 60.0
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated) * rate
+            )
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / rate
+
+    async def acquire(self) -> None:
+        """Wait until another operation is allowed to start."""
+        delay = self._reserve()
+        if delay:
+            await asyncio.sleep(delay)
+
+    def acquire_blocking(self) -> None:
+        """Block the thread until another operation is allowed to start."""
+        delay = self._reserve()
+        if delay:
+            time.sleep(delay)
+
+    def increase(self) -> None:
+        with self._lock:
+            if self._rate and self.adaptive:
+                self._rate = self._clamp(self._rate + self.increase_per_minute)
+
+    def decrease(self) -> bool:
+        """Slow down, returning False if the rate was lowered just now.
+
+        Requests in flight when the site starts throttling all fail
+        together, so the rate is lowered at most once per request interval
+        (and once per second) rather than once per failure.
+        """
+        with self._lock:
+            if not self._rate or not self.adaptive:
+                return False
+            now = time.monotonic()
+            if now - self._last_decrease < max(1.0, 60.0 / self._rate):
+                return False
+            self._last_decrease = now
+            self._rate = self._clamp(self._rate * self.decrease_factor)
+            return True
+
+
+class CircuitBreaker:
+    """Pauses callers after repeated failures until the site recovers.
+
+    After failure_threshold failures in a row the circuit opens and every
+    caller waits out the pause. Then a single probe is let through: its
+    success closes the circuit, its failure doubles the pause, up to
+    max_pause_seconds. Thread-safe, with async and blocking wait.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: Optional[int] = 5,
+        pause_seconds: float = 60,
+        max_pause_seconds: float = 900,
+    ):
+        """A failure_threshold of None or 0 never opens the circuit."""
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.pause_seconds = pause_seconds
+        self.max_pause_seconds = max_pause_seconds
+        self.state = self.CLOSED
+        self._failures = 0
+        self._pause = pause_seconds
+        self._reopens_at = 0.0
+        self._probe_started: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def _admit(self) -> float:
+        """Let a caller through, or return the seconds to wait first."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return 0.0
+            now = time.monotonic()
+            if self.state == self.OPEN:
+                if now < self._reopens_at:
+                    return self._reopens_at - now
+                self.state = self.HALF_OPEN
+                self._probe_started = None
+            # A probe that never reported back is replaced after a pause
+            if (
+                self._probe_started is None
+                or now - self._probe_started > self._pause
+            ):
+                self._probe_started = now
+                logger.info(f"Probing {self.name} after a pause")
+                return 0.0
+            return PROBE_POLL_INTERVAL
+
+    async def wait(self) -> None:
+        """Wait while the circuit is open."""
+        while True:
+            delay = self._admit()
+            if not delay:
+                return
+            await asyncio.sleep(delay)
+
+    def wait_blocking(self) -> None:
+        """Block the thread while the circuit is open."""
+        while True:
+            delay = self._admit()
+            if not delay:
+                return
+            time.sleep(delay)
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            # Requests started before the pause don't close it, the probe does
+            if self.state == self.HALF_OPEN:
+                logger.info(f"{self.name} recovered, resuming")
+                self.state = self.CLOSED
+                self._pause = self.pause_seconds
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self.state == self.HALF_OPEN:
+                self._pause = min(self._pause * 2, self.max_pause_seconds)
+            elif not (
+                self.state == self.CLOSED
+                and self.failure_threshold
+                and self._failures >= self.failure_threshold
+            ):
+                return
+            self.state = self.OPEN
+            self._reopens_at = time.monotonic() + self._pause
+            self._probe_started = None
+            logger.warning(
+                f"Pausing requests to {self.name} for {self._pause:.0f}s "
+                f"after {self._failures} failures in a row"
+            )
+            metrics.increment("circuit_opened", host=self.name)
+
+
+class HostThrottle:
+    """The adaptive rate limiter and circuit breaker of one host.
+
+    Callers acquire before each request and report how it went: success
+    speeds up, throttled slows down and counts as a failure, failure only
+    counts toward pausing, and empty counts empty results, a run of which
+    is taken as throttling.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        settings: ThrottleSettings,
+        max_per_minute: Optional[float] = None,
+    ):
+        self.host = host
+        self.empty_threshold = settings.empty_threshold
+        if settings.enabled:
+            self.limiter = AdaptiveRateLimiter(
+                settings.start_per_minute,
+                min_per_minute=settings.min_per_minute,
+                max_per_minute=max_per_minute or settings.max_per_minute,
+                increase_per_minute=settings.increase_per_minute,
+                decrease_factor=settings.decrease_factor,
+            )
+        else:
+            # Still held to the host's own limit, e.g. an account's quota
+            self.limiter = AdaptiveRateLimiter(
+                max_per_minute, max_per_minute=max_per_minute, adaptive=False
+            )
+        self.breaker = CircuitBreaker(
+            host,
+            failure_threshold=(
+                settings.failure_threshold if settings.enabled else None
+            ),
+            pause_seconds=settings.pause_seconds,
+            max_pause_seconds=settings.max_pause_seconds,
+        )
+        self._empty = 0
+
+    async def acquire(self) -> None:
+        """Wait out any pause, then for the host's next request slot."""
+        with metrics.timer("throttle_wait_seconds", host=self.host):
+            await self.breaker.wait()
+            await self.limiter.acquire()
+
+    def acquire_blocking(self) -> None:
+        with metrics.timer("throttle_wait_seconds", host=self.host):
+            self.breaker.wait_blocking()
+            self.limiter.acquire_blocking()
+
+    def success(self) -> None:
+        self._empty = 0
+        self.limiter.increase()
+        self.breaker.record_success()
+
+    def empty(self) -> None:
+        """Record a request that worked but found nothing."""
+        self._empty += 1
+        if self.empty_threshold and self._empty >= self.empty_threshold:
+            self._empty = 0
+            self.throttled("empty_results")
+
+    def throttled(self, reason: str) -> None:
+        """Record a 429, CAPTCHA or similar sign that the site pushes back."""
+        metrics.increment("throttle_events", host=self.host, reason=reason)
+        if self.limiter.decrease():
+            logger.warning(
+                f"{self.host} is throttling ({reason}), slowing to "
+                f"{self.limiter.rate_per_minute:.1f} requests/min"
+            )
+        self.breaker.record_failure()
+
+    def failure(self, reason: str) -> None:
+        """Record an error that isn't clearly throttling, e.g. a timeout."""
+        metrics.increment("throttle_failures", host=self.host, reason=reason)
+        self.breaker.record_failure()
+
+
+class ThrottleRegistry:
+    """One HostThrottle per host, shared by every stage in the process."""
+
+    def __init__(self, settings: Optional[ThrottleSettings] = None):
+        self.settings = settings
+        self._throttles: Dict[str, HostThrottle] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, settings: ThrottleSettings) -> None:
+        """Replace the settings, forgetting every host's state."""
+        with self._lock:
+            self.settings = settings
+            self._throttles.clear()
+
+    def get(
+        self, host: str, max_per_minute: Optional[float] = None
+    ) -> HostThrottle:
+        """Get a host's throttle, capping its rate if max_per_minute is set."""
+        with self._lock:
+            if self.settings is None:
+                self.settings = get_throttle_settings()
+            throttle = self._throttles.get(host)
+            if throttle is None:
+                throttle = HostThrottle(host, self.settings, max_per_minute)
+                self._throttles[host] = throttle
+            elif max_per_minute:
+                throttle.limiter.set_max(max_per_minute)
+            return throttle
+
+    def for_url(self, url: str) -> HostThrottle:
+        return self.get(urlparse(url).netloc)
+
+
+def get_throttle_settings() -> ThrottleSettings:
+    """Get the throttle settings from config."""
+    from config.config import THROTTLE_CONFIG
+
+    return ThrottleSettings(
+        enabled=THROTTLE_CONFIG.get("enabled", True),
+        start_per_minute=THROTTLE_CONFIG.get("start_per_minute", 60),
+        min_per_minute=THROTTLE_CONFIG.get("min_per_minute", 6),
+        max_per_minute=THROTTLE_CONFIG.get("max_per_minute", 600),
+        increase_per_minute=THROTTLE_CONFIG.get("increase_per_minute", 6),
+        decrease_factor=THROTTLE_CONFIG.get("decrease_factor", 0.5),
+        empty_threshold=THROTTLE_CONFIG.get("empty_threshold", 5),
+        failure_threshold=THROTTLE_CONFIG.get("failure_threshold", 5),
+        pause_seconds=THROTTLE_CONFIG.get("pause_seconds", 60),
+        max_pause_seconds=THROTTLE_CONFIG.get("max_pause_seconds", 900),
+    )
+
+
+# Shared by every stage, so Wellfound's search and company pages, Apollo
+# and SMTP each slow down together when their host pushes back
+throttles = ThrottleRegistry()